@@ -0,0 +1,156 @@
+"""
+ARP扫描模块 - 通过AF_PACKET原始套接字对本地网段发送ARP请求
+
+ICMP被防火墙拦截的主机仍然会应答ARP。扫描时预先构造好所有ARP请求帧，
+在同一个套接字上连续发送并收集应答，直接得到IP+MAC，无需再查询邻居表。
+需要 CAP_NET_RAW 权限，仅支持Linux。
+"""
+
+import asyncio
+import socket
+import struct
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+ETH_P_ARP = 0x0806
+ETH_P_IP = 0x0800
+ARP_REQUEST = 1
+ARP_REPLY = 2
+
+BROADCAST_MAC = b'\xff' * 6
+# 以太网最小帧长度（不含FCS）
+MIN_FRAME_SIZE = 60
+
+_ARP_HEADER = struct.Struct("!HHBBH6s4s6s4s")
+
+
+def arp_scan_supported() -> bool:
+    """检查当前系统是否支持AF_PACKET"""
+    return hasattr(socket, "AF_PACKET")
+
+
+def get_interface_mac(interface: str) -> bytes:
+    """读取网络接口的MAC地址"""
+    with open(f"/sys/class/net/{interface}/address", 'r') as f:
+        return bytes.fromhex(f.read().strip().replace(':', ''))
+
+
+def build_arp_request(src_mac: bytes, src_ip: bytes, target_ip: bytes) -> bytes:
+    """构造广播ARP请求帧"""
+    arp = _ARP_HEADER.pack(1, ETH_P_IP, 6, 4, ARP_REQUEST,
+                           src_mac, src_ip, b'\x00' * 6, target_ip)
+    frame = BROADCAST_MAC + src_mac + struct.pack("!H", ETH_P_ARP) + arp
+    return frame.ljust(MIN_FRAME_SIZE, b'\x00')
+
+
+def parse_arp_frame(frame) -> Optional[Tuple[int, bytes, bytes, bytes]]:
+    """解析以太网ARP帧（IPv4），返回 (操作码, 发送方MAC, 发送方IP, 目标IP)"""
+    if len(frame) < 14 + _ARP_HEADER.size or frame[12:14] != b'\x08\x06':
+        return None
+    _, ptype, hlen, plen, oper, sha, spa, _, tpa = _ARP_HEADER.unpack_from(frame, 14)
+    if ptype != ETH_P_IP or hlen != 6 or plen != 4:
+        return None
+    return oper, sha, spa, tpa
+
+
+def parse_arp_reply(frame: bytes) -> Optional[Tuple[bytes, bytes, bytes]]:
+    """解析ARP应答帧，返回 (发送方MAC, 发送方IP, 目标IP)"""
+    parsed = parse_arp_frame(frame)
+    if parsed is None or parsed[0] != ARP_REPLY:
+        return None
+    return parsed[1:]
+
+
+def open_arp_socket(interface: str) -> socket.socket:
+    """
+    打开绑定到指定接口的AF_PACKET套接字
+
+    Raises:
+        OSError: 不支持AF_PACKET或没有CAP_NET_RAW权限
+    """
+    if not arp_scan_supported():
+        raise OSError("当前系统不支持AF_PACKET")
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+    try:
+        sock.bind((interface, ETH_P_ARP))
+        sock.setblocking(False)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class ArpScanner:
+    """在单个AF_PACKET套接字上对本地网段进行ARP扫描"""
+
+    def __init__(self, interface: str, source_ip: str, timeout: float = 1.0, rate_limiter=None):
+        self.interface = interface
+        self.source_ip = socket.inet_aton(source_ip)
+        self.source_mac = get_interface_mac(interface)
+        self.timeout = timeout
+        # 可选的速率限制器，需提供 async acquire() 方法
+        self.rate_limiter = rate_limiter
+
+    async def iter_replies(self, targets: Iterable[str], timeout: Optional[float] = None,
+                           deadline: Optional[float] = None) -> AsyncIterator[Tuple[str, str]]:
+        """
+        发送ARP请求并按到达顺序产出 (IP, MAC)
+
+        Args:
+            targets: 本地网段内的IPv4地址
+            timeout: 最后一个请求发出后等待应答的时间
+            deadline: 整体期限（秒），到达后停止等待
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        pending = {socket.inet_aton(ip) for ip in targets}
+        # 预先构造所有请求帧
+        frames: List[bytes] = [build_arp_request(self.source_mac, self.source_ip, ip) for ip in pending]
+
+        sock = open_arp_socket(self.interface)
+        started = time.monotonic()
+        hard_deadline = started + deadline if deadline is not None else None
+        state = {"last_send": started}
+
+        async def send_all():
+            for frame in frames:
+                if self.rate_limiter is not None:
+                    await self.rate_limiter.acquire()
+                try:
+                    await loop.sock_sendall(sock, frame)
+                except OSError:
+                    pass
+                state["last_send"] = time.monotonic()
+
+        sender = loop.create_task(send_all())
+        try:
+            while pending:
+                now = time.monotonic()
+                wait = state["last_send"] + timeout - now if sender.done() else timeout
+                if hard_deadline is not None:
+                    wait = min(wait, hard_deadline - now)
+                if wait <= 0:
+                    break
+
+                try:
+                    frame = await asyncio.wait_for(loop.sock_recv(sock, 2048), wait)
+                except asyncio.TimeoutError:
+                    continue
+
+                reply = parse_arp_reply(frame)
+                if reply is None:
+                    continue
+                sha, spa, tpa = reply
+                if spa not in pending or tpa != self.source_ip:
+                    continue
+                pending.discard(spa)
+                yield socket.inet_ntoa(spa), ":".join(f"{b:02X}" for b in sha)
+        finally:
+            if not sender.done():
+                sender.cancel()
+                try:
+                    await sender
+                except asyncio.CancelledError:
+                    pass
+            sock.close()
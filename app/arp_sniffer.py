@@ -0,0 +1,155 @@
+"""
+ARP监听模块 - 在选定接口上被动监听ARP报文，记录每个MAC最后一次出现的时间和IP
+
+套接字上挂载经典BPF过滤器，内核只把截断到ARP头长度的ARP帧交给用户态；
+接收使用预分配缓冲区和 recvfrom_into，不为每个报文分配内存。
+需要 CAP_NET_RAW 权限，仅支持Linux。
+"""
+
+import asyncio
+import ctypes
+import socket
+import struct
+import time
+from typing import Any, Dict, Iterable, List, Optional
+
+from app.arp_scanner import ETH_P_ARP, arp_scan_supported, parse_arp_frame
+
+SO_ATTACH_FILTER = 26
+PACKET_OUTGOING = 4
+
+# 以太网头(14) + IPv4 ARP(28)
+ARP_FRAME_SIZE = 42
+
+# 经典BPF: ldh [12]; jeq #0x806, L1, L2; L1: ret #42; L2: ret #0
+ARP_BPF_PROGRAM = (
+    (0x28, 0, 0, 12),
+    (0x15, 0, 1, ETH_P_ARP),
+    (0x06, 0, 0, ARP_FRAME_SIZE),
+    (0x06, 0, 0, 0),
+)
+
+
+def attach_arp_filter(sock: socket.socket):
+    """在套接字上挂载只接受ARP帧的BPF过滤器"""
+    program = b"".join(struct.pack("HBBI", *instruction) for instruction in ARP_BPF_PROGRAM)
+    buffer = ctypes.create_string_buffer(program)
+    # struct sock_fprog { unsigned short len; struct sock_filter *filter; }
+    fprog = struct.pack("HL", len(ARP_BPF_PROGRAM), ctypes.addressof(buffer))
+    sock.setsockopt(socket.SOL_SOCKET, SO_ATTACH_FILTER, fprog)
+
+
+def open_sniffer_socket(interface: str) -> socket.socket:
+    """
+    打开挂载了ARP过滤器、绑定到指定接口的AF_PACKET套接字
+
+    Raises:
+        OSError: 不支持AF_PACKET或没有CAP_NET_RAW权限
+    """
+    if not arp_scan_supported():
+        raise OSError("当前系统不支持AF_PACKET")
+    sock = socket.socket(socket.AF_PACKET, socket.SOCK_RAW, socket.htons(ETH_P_ARP))
+    try:
+        attach_arp_filter(sock)
+        sock.bind((interface, ETH_P_ARP))
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+class PresenceTracker:
+    """按MAC记录最后出现时间，并维护 IP -> MAC 映射"""
+
+    def __init__(self, max_entries: int = 16384):
+        self.max_entries = max_entries
+        self._by_mac: Dict[str, Dict[str, Any]] = {}
+        self._ip_to_mac: Dict[str, str] = {}
+
+    def seen(self, mac: str, ip: str = "", interface: str = "", at: Optional[float] = None):
+        """记录一次出现"""
+        entry = self._by_mac.pop(mac, None)
+        if entry is None:
+            if len(self._by_mac) >= self.max_entries:
+                evicted = self._by_mac.pop(next(iter(self._by_mac)))
+                if self._ip_to_mac.get(evicted["ip"]) == evicted["mac"]:
+                    del self._ip_to_mac[evicted["ip"]]
+            entry = {"mac": mac, "ip": "", "interface": interface}
+        if ip:
+            entry["ip"] = ip
+            self._ip_to_mac[ip] = mac
+        entry["interface"] = interface or entry["interface"]
+        entry["last_seen"] = time.time() if at is None else at
+        # 重新插入，字典顺序即最近出现顺序
+        self._by_mac[mac] = entry
+
+    def last_seen(self, mac: str) -> Optional[float]:
+        """MAC最后一次出现的时间戳"""
+        entry = self._by_mac.get(mac.upper())
+        return entry["last_seen"] if entry else None
+
+    def mac_for_ip(self, ip: str) -> Optional[str]:
+        """最近一次使用该IP的MAC"""
+        return self._ip_to_mac.get(ip)
+
+
+class ArpSniffer:
+    """后台ARP监听任务，每个接口一个套接字"""
+
+    def __init__(self, interfaces: Iterable[str], tracker: PresenceTracker):
+        self.interfaces = list(interfaces)
+        self.tracker = tracker
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self) -> List[str]:
+        """在所有可用接口上启动监听，返回成功启动的接口"""
+        loop = asyncio.get_running_loop()
+        started = []
+        for interface in self.interfaces:
+            try:
+                sock = open_sniffer_socket(interface)
+            except OSError as e:
+                print(f"接口 {interface} ARP监听启动失败: {e}")
+                continue
+            self._tasks.append(loop.create_task(self._run(interface, sock)))
+            started.append(interface)
+        return started
+
+    async def _run(self, interface: str, sock: socket.socket):
+        """单个接口的接收循环"""
+        loop = asyncio.get_running_loop()
+        buffer = bytearray(ARP_FRAME_SIZE)
+        view = memoryview(buffer)
+        readable = asyncio.Event()
+        loop.add_reader(sock.fileno(), readable.set)
+        try:
+            while True:
+                await readable.wait()
+                readable.clear()
+                while True:
+                    try:
+                        size, address = sock.recvfrom_into(buffer)
+                    except BlockingIOError:
+                        break
+                    if address[2] == PACKET_OUTGOING:
+                        continue
+                    parsed = parse_arp_frame(view[:size])
+                    if parsed is None:
+                        continue
+                    _, sha, spa, _ = parsed
+                    if not any(sha):
+                        continue
+                    # ARP探测（发送方IP为0.0.0.0）只更新出现时间
+                    ip = socket.inet_ntoa(spa) if any(spa) else ""
+                    self.tracker.seen(":".join(f"{b:02X}" for b in sha), ip, interface)
+        finally:
+            loop.remove_reader(sock.fileno())
+            sock.close()
+
+    async def stop(self):
+        """停止所有接口的监听"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
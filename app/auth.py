@@ -5,6 +5,7 @@
 import os
 import secrets
 import hashlib
+import heapq
 import ipaddress
 import json
 from datetime import datetime, timedelta
@@ -19,6 +20,11 @@ from passlib.context import CryptContext
 from PIL import Image, ImageDraw, ImageFont
 import random
 import string
+import threading
+import time
+from collections import OrderedDict, deque
+
+from app.ip_matcher import CidrMatcher, DecisionCache
 
 # 密码加密上下文
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -34,16 +40,37 @@ security = HTTPBearer(auto_error=False)
 # 内存中的验证码存储（生产环境建议使用Redis）
 captcha_store: Dict[str, Dict[str, Any]] = {}
 
+# 预渲染验证码池大小，0 表示每次请求同步渲染
+CAPTCHA_POOL_SIZE = int(os.getenv('WOL_CAPTCHA_POOL_SIZE', '32'))
+
 # 会话存储（生产环境建议使用Redis）
 session_store: Dict[str, Dict[str, Any]] = {}
 
 # IP白名单存储（生产环境建议使用数据库）
 ip_whitelist: Set[str] = set()
 
+# 解码后的令牌缓存容量
+TOKEN_CACHE_SIZE = int(os.getenv('WOL_TOKEN_CACHE_SIZE', '1024'))
+
+# 按客户端IP缓存的白名单判定结果，白名单变化时递增代数失效
+whitelist_decisions = DecisionCache(int(os.getenv('WOL_WHITELIST_CACHE_SIZE', '4096')))
+
+# 编译后的白名单匹配器，白名单变化时整体替换
+whitelist_matcher = CidrMatcher()
+
 # 白名单文件路径
 WHITELIST_FILE = "ip_whitelist.json"
 
 
+def rebuild_whitelist_matcher():
+    """白名单变化后重新编译匹配器，并使判定缓存失效"""
+    global whitelist_matcher
+    whitelist_matcher = CidrMatcher(ip_whitelist)
+    if whitelist_matcher.invalid:
+        print(f"忽略无效的白名单条目: {', '.join(whitelist_matcher.invalid)}")
+    whitelist_decisions.invalidate()
+
+
 class AuthConfig:
     """认证配置类"""
 
@@ -81,6 +108,7 @@ class AuthConfig:
         except Exception as e:
             print(f"加载IP白名单失败: {e}")
             ip_whitelist = {'127.0.0.1', '::1'}  # 默认白名单
+        rebuild_whitelist_matcher()
 
     def save_ip_whitelist(self):
         """保存IP白名单到文件"""
@@ -112,18 +140,130 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 
+class TokenCache:
+    """
+    已验证令牌缓存 - 令牌摘要 -> (过期时间, 用户名)
+
+    只缓存验证通过的令牌，条目保留到令牌的 exp；吊销的令牌摘要记录到其 exp 为止，
+    期间即使签名有效也视为无效。吊销记录按 exp 保存在小顶堆中，过期记录从堆顶清理，
+    超过 max_revoked 时淘汰最早过期的记录。
+    """
+
+    def __init__(self, max_entries: int = 1024, max_revoked: int = 4096):
+        self.max_entries = max_entries
+        self.max_revoked = max_revoked
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[bytes, tuple]" = OrderedDict()
+        self._revoked: Dict[bytes, float] = {}
+        self._revoked_heap: List[tuple] = []
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def digest(token: str) -> bytes:
+        return hashlib.sha256(token.encode()).digest()
+
+    def get(self, key: bytes) -> Optional[str]:
+        """返回未过期的缓存用户名"""
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            if now >= entry[0]:
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def put(self, key: bytes, expires_at: float, username: str):
+        """缓存验证通过的令牌"""
+        with self._lock:
+            if key in self._revoked:
+                return
+            self._entries[key] = (expires_at, username)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def is_revoked(self, key: bytes) -> bool:
+        return key in self._revoked
+
+    def revoke(self, key: bytes, expires_at: float):
+        """吊销令牌直到其过期，并清理已过期的吊销记录"""
+        now = time.time()
+        with self._lock:
+            self._entries.pop(key, None)
+            heap = self._revoked_heap
+            while heap and heap[0][0] <= now:
+                del self._revoked[heapq.heappop(heap)[1]]
+            if expires_at <= now or key in self._revoked:
+                return
+            if len(heap) >= self.max_revoked:
+                _, evicted = heapq.heappop(heap)
+                del self._revoked[evicted]
+                print(f"吊销记录超过上限 {self.max_revoked}，淘汰最早过期的记录")
+            self._revoked[key] = expires_at
+            heapq.heappush(heap, (expires_at, key))
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "revoked": len(self._revoked),
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
+
+
+token_cache = TokenCache(TOKEN_CACHE_SIZE)
+
+
 def verify_token(token: str) -> Optional[Dict[str, Any]]:
-    """验证访问令牌"""
+    """验证访问令牌（验证通过的令牌在过期前直接从缓存返回）"""
+    key = TokenCache.digest(token)
+    if token_cache.is_revoked(key):
+        return None
+    username = token_cache.get(key)
+    if username is not None:
+        return {"username": username}
     try:
         payload = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
         username: str = payload.get("sub")
         if username is None:
             return None
+        expires_at = payload.get("exp")
+        if isinstance(expires_at, (int, float)):
+            token_cache.put(key, float(expires_at), username)
         return {"username": username}
     except JWTError:
         return None
 
 
+def revoke_token(token: str):
+    """吊销令牌（登出时调用），令牌在原过期时间之前都不再有效；签名无效或已过期的令牌被忽略"""
+    try:
+        claims = jwt.decode(token, SECRET_KEY, algorithms=[ALGORITHM])
+    except JWTError:
+        return
+    expires_at = claims.get("exp")
+    if not isinstance(expires_at, (int, float)):
+        expires_at = time.time() + ACCESS_TOKEN_EXPIRE_MINUTES * 60
+    token_cache.revoke(TokenCache.digest(token), float(expires_at))
+
+
+def get_token_cache_stats() -> Dict[str, Any]:
+    """令牌缓存的统计（含命中率）"""
+    return token_cache.stats()
+
+
 def generate_captcha_text(length: int = 4) -> str:
     """生成验证码文本"""
     # 避免容易混淆的字符
@@ -131,45 +271,55 @@ def generate_captcha_text(length: int = 4) -> str:
     return ''.join(random.choice(chars) for _ in range(length))
 
 
+# 验证码字体候选路径（在不同系统上尝试不同的字体路径）
+CAPTCHA_FONT_PATHS = [
+    "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
+    "/System/Library/Fonts/Arial.ttf",  # macOS
+    "C:/Windows/Fonts/arial.ttf",  # Windows
+]
+
+# 噪点密度：约 100 / (120 * 40) 的像素为噪点
+CAPTCHA_NOISE_THRESHOLD = 5
+
+# 噪点掩码查找表（bytes.translate）：随机字节低于阈值的像素为噪点
+_NOISE_MASK_TABLE = bytes(255 if value < CAPTCHA_NOISE_THRESHOLD else 0 for value in range(256))
+
+# 噪点颜色查找表：随机字节映射到 200-255 的浅色
+_NOISE_COLOR_TABLE = bytes(200 + value * 56 // 256 for value in range(256))
+
+
+def load_captcha_font(size: int = 20):
+    """加载验证码字体，找不到系统字体时使用默认字体"""
+    for font_path in CAPTCHA_FONT_PATHS:
+        try:
+            return ImageFont.truetype(font_path, size)
+        except OSError:
+            continue
+    return ImageFont.load_default()
+
+
+# 字体只在启动时加载一次
+captcha_font = load_captcha_font()
+
+
 def create_captcha_image(text: str, width: int = 120, height: int = 40) -> str:
     """创建验证码图片并返回base64编码"""
-    # 创建图片
-    image = Image.new('RGB', (width, height), color='white')
+    # 背景噪点：随机字节经查找表一次生成掩码和浅色层，合成到白色背景上
+    size = (width, height)
+    mask = Image.frombuffer('L', size, os.urandom(width * height).translate(_NOISE_MASK_TABLE), 'raw', 'L', 0, 1)
+    noise = Image.frombuffer('RGB', size, os.urandom(width * height * 3).translate(_NOISE_COLOR_TABLE),
+                             'raw', 'RGB', 0, 1)
+    image = Image.new('RGB', size, color='white')
+    image.paste(noise, mask=mask)
     draw = ImageDraw.Draw(image)
-    
-    # 尝试使用系统字体，如果失败则使用默认字体
-    try:
-        # 在不同系统上尝试不同的字体路径
-        font_paths = [
-            "/usr/share/fonts/truetype/dejavu/DejaVuSans-Bold.ttf",  # Linux
-            "/System/Library/Fonts/Arial.ttf",  # macOS
-            "C:/Windows/Fonts/arial.ttf",  # Windows
-        ]
-        font = None
-        for font_path in font_paths:
-            try:
-                font = ImageFont.truetype(font_path, 20)
-                break
-            except:
-                continue
-        
-        if font is None:
-            font = ImageFont.load_default()
-    except:
-        font = ImageFont.load_default()
-    
-    # 添加背景噪点
-    for _ in range(100):
-        x = random.randint(0, width)
-        y = random.randint(0, height)
-        draw.point((x, y), fill=(random.randint(200, 255), random.randint(200, 255), random.randint(200, 255)))
-    
+    font = captcha_font
+
     # 绘制验证码文本
     text_width = draw.textlength(text, font=font) if hasattr(draw, 'textlength') else len(text) * 15
     text_height = 20
     x = (width - text_width) // 2
     y = (height - text_height) // 2
-    
+
     # 为每个字符添加随机颜色和位置偏移
     char_width = text_width // len(text)
     for i, char in enumerate(text):
@@ -177,26 +327,105 @@ def create_captcha_image(text: str, width: int = 120, height: int = 40) -> str:
         char_y = y + random.randint(-3, 3)
         color = (random.randint(0, 100), random.randint(0, 100), random.randint(0, 100))
         draw.text((char_x, char_y), char, fill=color, font=font)
-    
+
     # 添加干扰线
     for _ in range(3):
         start = (random.randint(0, width), random.randint(0, height))
         end = (random.randint(0, width), random.randint(0, height))
         draw.line([start, end], fill=(random.randint(100, 200), random.randint(100, 200), random.randint(100, 200)), width=1)
-    
-    # 转换为base64
+
+    # 转换为base64（快速压缩：编码耗时减半，体积只增加约5%）
     buffer = BytesIO()
-    image.save(buffer, format='PNG')
+    image.save(buffer, format='PNG', compress_level=1)
     img_str = base64.b64encode(buffer.getvalue()).decode()
-    
+
     return f"data:image/png;base64,{img_str}"
 
 
+def render_captcha() -> tuple:
+    """渲染一个验证码，返回 (文本, base64图片)"""
+    captcha_text = generate_captcha_text()
+    return captcha_text, create_captcha_image(captcha_text)
+
+
+class CaptchaPool:
+    """
+    预渲染验证码池 - 后台线程将池补充到 size 个，请求只从池中取出
+
+    后台线程由应用启动时调用 start() 启动、关闭时调用 stop() 停止；未启动或池为空
+    （刚启动尚未补充或突发请求耗尽）时同步渲染。每个验证码只会被取出一次。
+    """
+
+    def __init__(self, size: int, render=render_captcha):
+        self.size = size
+        self.fallbacks = 0
+        self._render = render
+        self._items: deque = deque()
+        self._wakeup = threading.Event()
+        self._lock = threading.Lock()
+        self._thread: Optional[threading.Thread] = None
+        self._stopped = False
+
+    def start(self):
+        """启动后台补充线程（重复调用无副作用）"""
+        if self._thread is not None or self.size <= 0:
+            return
+        with self._lock:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._refill_loop, name="captcha-pool", daemon=True)
+                self._thread.start()
+
+    def _refill_loop(self):
+        """补充到池满后等待被唤醒"""
+        while not self._stopped:
+            self._wakeup.clear()
+            while len(self._items) < self.size and not self._stopped:
+                try:
+                    self._items.append(self._render())
+                except Exception as e:
+                    print(f"预渲染验证码失败: {e}")
+                    break
+            self._wakeup.wait()
+
+    def pop(self) -> tuple:
+        """取出一个验证码，池为空时同步渲染"""
+        try:
+            item = self._items.popleft()
+        except IndexError:
+            item = None
+        self._wakeup.set()
+        if item is None:
+            self.fallbacks += 1
+            item = self._render()
+        return item
+
+    def stop(self):
+        """停止后台补充线程并等待其退出"""
+        with self._lock:
+            thread, self._thread = self._thread, None
+            self._stopped = True
+            self._wakeup.set()
+        if thread is not None:
+            thread.join(timeout=5)
+
+    def stats(self) -> Dict[str, Any]:
+        """池统计"""
+        return {"size": self.size, "available": len(self._items), "fallbacks": self.fallbacks}
+
+
+captcha_pool = CaptchaPool(CAPTCHA_POOL_SIZE)
+
+
+def get_captcha_pool_stats() -> Dict[str, Any]:
+    """验证码池的统计（池大小、可用数和同步渲染次数）"""
+    return captcha_pool.stats()
+
+
 def generate_captcha() -> Dict[str, str]:
-    """生成验证码"""
+    """生成验证码（从预渲染池中取出）"""
     captcha_id = secrets.token_urlsafe(16)
-    captcha_text = generate_captcha_text()
-    captcha_image = create_captcha_image(captcha_text)
+    captcha_text, captcha_image = captcha_pool.pop()
     
     # 存储验证码（5分钟过期）
     captcha_store[captcha_id] = {
@@ -358,34 +587,21 @@ def get_client_ip(request: Request) -> str:
     return request.client.host if request.client else "unknown"
 
 
+def _match_whitelist(ip: str) -> bool:
+    """用当前匹配器判断（在判定缓存取得代数之后读取匹配器，避免缓存旧匹配器的结果）"""
+    return whitelist_matcher.contains(ip)
+
+
 def is_ip_in_whitelist(ip: str) -> bool:
-    """检查IP是否在白名单中"""
+    """检查IP是否在白名单中（支持单个IP和CIDR网段）"""
     if not ip or ip == "unknown":
         return False
+    return whitelist_decisions.lookup(ip, _match_whitelist)
 
-    try:
-        client_ip = ipaddress.ip_address(ip)
-
-        for whitelist_ip in ip_whitelist:
-            try:
-                # 支持单个IP和CIDR网段
-                if '/' in whitelist_ip:
-                    # CIDR网段
-                    network = ipaddress.ip_network(whitelist_ip, strict=False)
-                    if client_ip in network:
-                        return True
-                else:
-                    # 单个IP
-                    if client_ip == ipaddress.ip_address(whitelist_ip):
-                        return True
-            except ValueError:
-                # 无效的IP格式，跳过
-                continue
 
-        return False
-    except ValueError:
-        # 无效的客户端IP
-        return False
+def get_whitelist_cache_stats() -> Dict[str, Any]:
+    """白名单判定缓存的统计（含命中率）"""
+    return whitelist_decisions.stats()
 
 
 def add_ip_to_whitelist(ip: str) -> bool:
@@ -400,6 +616,7 @@ def add_ip_to_whitelist(ip: str) -> bool:
             ipaddress.ip_address(ip)
 
         ip_whitelist.add(ip)
+        rebuild_whitelist_matcher()
         auth_config.save_ip_whitelist()
         return True
     except ValueError:
@@ -410,6 +627,7 @@ def remove_ip_from_whitelist(ip: str) -> bool:
     """从白名单移除IP"""
     if ip in ip_whitelist:
         ip_whitelist.remove(ip)
+        rebuild_whitelist_matcher()
         auth_config.save_ip_whitelist()
         return True
     return False
@@ -0,0 +1,147 @@
+"""
+发现结果缓存模块 - stale-while-revalidate 语义
+
+缓存最近一次发现结果并立即返回；结果超过软TTL时在后台启动一次刷新，
+刷新期间的所有调用方继续拿到旧结果。任意时刻最多只有一个刷新任务（single-flight）。
+流式客户端订阅正在进行的刷新，先收到已发现的设备，之后实时收到新的发现事件。
+"""
+
+import asyncio
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Set, Tuple
+
+# 发现事件回调：(事件类型, 设备)
+Publish = Callable[[str, Dict[str, Any]], None]
+
+
+class DiscoveryCache:
+    """发现结果的 stale-while-revalidate 缓存"""
+
+    def __init__(self, loader: Callable[[Publish], Awaitable[List[Dict[str, Any]]]], soft_ttl: float = 60):
+        # loader(publish) 执行一次完整发现，过程中通过 publish 报告每个发现事件
+        self.loader = loader
+        self.soft_ttl = soft_ttl
+        self._devices: Optional[List[Dict[str, Any]]] = None
+        self._updated: float = 0.0
+        self._refresh_task: Optional[asyncio.Task] = None
+        self.last_error: Optional[str] = None
+        # 当前刷新已发现的设备（供新订阅者回放）和订阅者队列
+        self._inflight: Dict[str, Dict[str, Any]] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        # 只有订阅者需要当前刷新时，最后一个订阅者离开后取消刷新
+        self._subscribers_only = False
+
+    def age(self) -> Optional[float]:
+        """缓存结果的年龄（秒），没有结果时返回None"""
+        return None if self._devices is None else time.monotonic() - self._updated
+
+    @property
+    def refreshing(self) -> bool:
+        """是否有刷新任务在运行"""
+        return self._refresh_task is not None and not self._refresh_task.done()
+
+    def set(self, devices: List[Dict[str, Any]]):
+        """写入新的发现结果"""
+        self._devices = list(devices)
+        self._updated = time.monotonic()
+        self.last_error = None
+
+    def publish(self, event: str, device: Dict[str, Any]):
+        """记录刷新过程中的发现事件并转发给所有订阅者"""
+        if event == "remove":
+            self._inflight.pop(device["ip"], None)
+        else:
+            self._inflight[device["ip"]] = device
+        for queue in self._subscribers:
+            queue.put_nowait((event, device))
+
+    def _finish(self, item: Tuple[str, Any]):
+        """向所有订阅者发送结束事件"""
+        for queue in self._subscribers:
+            queue.put_nowait(item)
+        self._inflight = {}
+
+    async def _refresh(self):
+        """执行一次发现并更新缓存"""
+        try:
+            devices = await self.loader(self.publish)
+        except asyncio.CancelledError:
+            self._finish(("error", RuntimeError("设备发现已取消")))
+            raise
+        except Exception as e:
+            self.last_error = str(e)
+            print(f"刷新发现缓存失败: {e}")
+            self._finish(("error", e))
+            raise
+        self.set(devices)
+        self._finish(("done", self._devices))
+
+    def refresh(self) -> asyncio.Task:
+        """启动后台刷新，已有刷新在运行时返回同一个任务"""
+        if not self.refreshing:
+            self._inflight = {}
+            self._subscribers_only = False
+            self._refresh_task = asyncio.get_running_loop().create_task(self._refresh())
+            # 后台刷新的异常已记录在 last_error 中
+            self._refresh_task.add_done_callback(lambda t: t.cancelled() or t.exception())
+        return self._refresh_task
+
+    def subscribe(self) -> asyncio.Queue:
+        """
+        订阅正在进行的刷新（没有时启动一次），返回事件队列
+
+        队列先收到当前刷新已发现的设备 ("device", 设备)，之后收到实时事件，
+        最后收到 ("done", 设备列表) 或 ("error", 异常)。
+        """
+        if not self.refreshing:
+            self.refresh()
+            self._subscribers_only = True
+        queue: asyncio.Queue = asyncio.Queue()
+        for device in self._inflight.values():
+            queue.put_nowait(("device", device))
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """取消订阅；由订阅启动且无人等待的刷新在最后一个订阅者离开时取消"""
+        self._subscribers.discard(queue)
+        if not self._subscribers and self._subscribers_only and self.refreshing:
+            print("所有客户端已断开，取消设备发现")
+            self._refresh_task.cancel()
+
+    async def get(self) -> Dict[str, Any]:
+        """
+        获取发现结果
+
+        有缓存时立即返回（过期则同时触发后台刷新）；
+        没有缓存时等待唯一的刷新任务完成，调用方断开不会取消该任务。
+
+        Returns:
+            Dict[str, Any]: {"devices": [...], "age": 秒, "stale": bool, "refreshing": bool}
+        """
+        if self._devices is None:
+            task = self.refresh()
+            # 有非订阅者在等待结果，订阅者离开时不再取消刷新
+            self._subscribers_only = False
+            await asyncio.shield(task)
+
+        age = self.age()
+        stale = age > self.soft_ttl
+        if stale:
+            self.refresh()
+            self._subscribers_only = False
+        return {
+            "devices": self._devices,
+            "age": round(age, 3),
+            "stale": stale,
+            "refreshing": self.refreshing
+        }
+
+    async def stop(self):
+        """取消正在运行的刷新"""
+        if self.refreshing:
+            self._refresh_task.cancel()
+            try:
+                await self._refresh_task
+            except (asyncio.CancelledError, Exception):
+                pass
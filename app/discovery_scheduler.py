@@ -0,0 +1,155 @@
+"""
+后台发现调度模块 - 按网段定时执行设备发现，只发布与上次结果的差异
+"""
+
+import asyncio
+import ipaddress
+import time
+from typing import Any, Awaitable, Callable, Dict, List, Set
+
+# 参与比较的设备字段（状态、时间等易变字段不计入变化）
+DIFF_FIELDS = ("mac", "hostname")
+
+
+def parse_schedule(spec: str, default_interval: float = 0) -> Dict[str, float]:
+    """
+    解析网段调度配置
+
+    Args:
+        spec: 形如 "192.168.1.0/24=300,10.0.0.0/20=900" 的配置，省略间隔时使用默认间隔
+        default_interval: 默认间隔（秒）
+
+    Returns:
+        Dict[str, float]: {网段: 间隔秒数}
+    """
+    schedule = {}
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        network, _, interval = item.partition("=")
+        try:
+            network = str(ipaddress.IPv4Network(network.strip(), strict=False))
+            seconds = float(interval) if interval else default_interval
+        except ValueError:
+            print(f"忽略无效的调度配置: {item}")
+            continue
+        if seconds > 0:
+            schedule[network] = seconds
+    return schedule
+
+
+def diff_devices(previous: Dict[str, Dict[str, Any]],
+                 current: Dict[str, Dict[str, Any]]) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    比较两次发现结果（以IP为键）
+
+    Returns:
+        Dict[str, List]: {"added": [...], "changed": [...], "removed": [...]}
+    """
+    added = [device for ip, device in current.items() if ip not in previous]
+    removed = [device for ip, device in previous.items() if ip not in current]
+    changed = [
+        device for ip, device in current.items()
+        if ip in previous and any(device.get(f) != previous[ip].get(f) for f in DIFF_FIELDS)
+    ]
+    return {"added": added, "changed": changed, "removed": removed}
+
+
+class DiscoveryScheduler:
+    """
+    按网段独立调度的后台发现任务
+
+    每个网段一个循环任务，每次运行后与该网段上次结果比较，
+    有变化时向所有订阅者发布差异事件。
+    """
+
+    def __init__(self, discover: Callable[[str], Awaitable[List[Dict[str, Any]]]],
+                 schedule: Dict[str, float], queue_size: int = 100):
+        self.discover = discover
+        self.schedule = schedule
+        self.queue_size = queue_size
+        self.snapshots: Dict[str, Dict[str, Dict[str, Any]]] = {}
+        self.last_run: Dict[str, float] = {}
+        self._subscribers: Set[asyncio.Queue] = set()
+        self._tasks: List[asyncio.Task] = []
+
+    def start(self):
+        """启动所有网段的调度任务"""
+        if self._tasks:
+            return
+        loop = asyncio.get_running_loop()
+        for network, interval in self.schedule.items():
+            self._tasks.append(loop.create_task(self._run_subnet(network, interval)))
+            print(f"后台发现已启用: {network} 每 {interval:g}s")
+
+    async def stop(self):
+        """停止所有调度任务"""
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    async def _run_subnet(self, network: str, interval: float):
+        """单个网段的调度循环"""
+        while True:
+            started = time.monotonic()
+            try:
+                await self.run_once(network)
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"后台发现 {network} 失败: {e}")
+            await asyncio.sleep(max(0.0, interval - (time.monotonic() - started)))
+
+    async def run_once(self, network: str) -> Dict[str, List[Dict[str, Any]]]:
+        """对一个网段执行一次发现并发布差异"""
+        devices = await self.discover(network)
+        current = {device["ip"]: device for device in devices}
+        previous = self.snapshots.get(network, {})
+        delta = diff_devices(previous, current)
+
+        self.snapshots[network] = current
+        self.last_run[network] = time.time()
+
+        if delta["added"] or delta["changed"] or delta["removed"]:
+            self.publish({"type": "delta", "subnet": network, "timestamp": self.last_run[network], **delta})
+        return delta
+
+    def publish(self, event: Dict[str, Any]):
+        """向所有订阅者发布事件，队列已满时丢弃最旧的事件"""
+        for queue in self._subscribers:
+            if queue.full():
+                try:
+                    queue.get_nowait()
+                except asyncio.QueueEmpty:
+                    pass
+            queue.put_nowait(event)
+
+    def subscribe(self) -> asyncio.Queue:
+        """订阅差异事件"""
+        queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        """取消订阅"""
+        self._subscribers.discard(queue)
+
+    def devices(self) -> List[Dict[str, Any]]:
+        """当前所有网段的最新设备列表"""
+        merged = {}
+        for snapshot in self.snapshots.values():
+            merged.update(snapshot)
+        return list(merged.values())
+
+    def status(self) -> Dict[str, Any]:
+        """各网段的调度状态"""
+        return {
+            subnet: {
+                "interval": interval,
+                "last_run": self.last_run.get(subnet),
+                "devices": len(self.snapshots.get(subnet, {})),
+            }
+            for subnet, interval in self.schedule.items()
+        }
@@ -0,0 +1,99 @@
+"""
+主机名解析模块 - 并发反向DNS查询，带正/负结果TTL缓存
+
+查询在专用线程池中执行（socket.getnameinfo 是阻塞调用），线程池大小即并发上限。
+结果由工作线程直接写入缓存，调用方放弃等待（超时或取消）后，查询完成时仍会填充缓存，
+下一次发现即可直接命中。
+"""
+
+import asyncio
+import socket
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Optional, Tuple
+
+
+class HostnameResolver:
+    """带TTL缓存的并发反向DNS解析器"""
+
+    def __init__(self, concurrency: int = 32, timeout: float = 1.0,
+                 positive_ttl: float = 3600, negative_ttl: float = 300, max_entries: int = 65536):
+        self.timeout = timeout
+        self.positive_ttl = positive_ttl
+        self.negative_ttl = negative_ttl
+        self.max_entries = max_entries
+        self._executor = ThreadPoolExecutor(max_workers=max(1, concurrency), thread_name_prefix="rdns")
+        self._lock = threading.Lock()
+        # ip -> (主机名, 过期时间)，主机名为空字符串表示没有PTR记录
+        self._cache: Dict[str, Tuple[str, float]] = {}
+        # 正在查询的地址，避免重复提交
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    def cached(self, ip: str) -> Optional[str]:
+        """返回未过期的缓存结果，未命中返回None"""
+        with self._lock:
+            entry = self._cache.get(ip)
+            if entry is None:
+                return None
+            if entry[1] <= time.monotonic():
+                del self._cache[ip]
+                return None
+            return entry[0]
+
+    def _store(self, ip: str, hostname: str):
+        """写入缓存，超过容量时先清理过期项，仍超出则淘汰最早写入的项"""
+        ttl = self.positive_ttl if hostname else self.negative_ttl
+        now = time.monotonic()
+        with self._lock:
+            self._cache.pop(ip, None)
+            if len(self._cache) >= self.max_entries:
+                for key in [k for k, (_, expires) in self._cache.items() if expires <= now]:
+                    del self._cache[key]
+                while len(self._cache) >= self.max_entries:
+                    del self._cache[next(iter(self._cache))]
+            self._cache[ip] = (hostname, now + ttl)
+
+    def _lookup(self, ip: str) -> str:
+        """在工作线程中执行反向查询并写入缓存"""
+        try:
+            hostname = socket.getnameinfo((ip, 0), socket.NI_NAMEREQD)[0].rstrip(".")
+        except (socket.gaierror, socket.herror, OSError):
+            hostname = ""
+        self._store(ip, hostname)
+        return hostname
+
+    async def resolve(self, ip: str, timeout: Optional[float] = None) -> str:
+        """
+        解析单个地址的主机名
+
+        Returns:
+            str: 主机名，没有PTR记录或超时返回空字符串
+        """
+        hostname = self.cached(ip)
+        if hostname is not None:
+            return hostname
+
+        future = self._inflight.get(ip)
+        if future is None:
+            loop = asyncio.get_running_loop()
+            future = loop.run_in_executor(self._executor, self._lookup, ip)
+            self._inflight[ip] = future
+            future.add_done_callback(lambda _: self._inflight.pop(ip, None))
+
+        try:
+            # shield: 超时只放弃等待，查询本身继续并写入缓存
+            return await asyncio.wait_for(asyncio.shield(future), self.timeout if timeout is None else timeout)
+        except asyncio.TimeoutError:
+            return ""
+
+    def stats(self) -> Dict[str, int]:
+        """缓存统计"""
+        with self._lock:
+            positive = sum(1 for hostname, _ in self._cache.values() if hostname)
+            return {"entries": len(self._cache), "positive": positive,
+                    "negative": len(self._cache) - positive, "inflight": len(self._inflight)}
+
+    def close(self):
+        """关闭线程池，不等待未完成的查询"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,196 @@
+"""
+ICMP扫描模块 - 进程内发送ICMP回显请求，无需为每个地址启动ping进程
+
+进程的组在 net.ipv4.ping_group_range 范围内时优先使用非特权的 SOCK_DGRAM/IPPROTO_ICMP 套接字，
+否则优先使用需要 CAP_NET_RAW 的原始套接字。所有探测共用一个套接字发送，
+按标识符/序列号和源地址对回复进行分拣。
+"""
+
+import asyncio
+import os
+import socket
+import struct
+import time
+from typing import AsyncIterator, Iterable, List, Optional, Tuple
+
+ICMP_ECHO_REPLY = 0
+ICMP_ECHO_REQUEST = 8
+
+PING_GROUP_RANGE_FILE = "/proc/sys/net/ipv4/ping_group_range"
+
+# 套接字类型的尝试顺序 [(类型, 是否原始套接字)]，首次打开时根据 ping_group_range 确定
+_socket_types: Optional[List[Tuple[int, bool]]] = None
+
+
+def icmp_checksum(data: bytes) -> int:
+    """计算ICMP校验和"""
+    if len(data) % 2:
+        data += b'\x00'
+    total = sum(struct.unpack(f"!{len(data) // 2}H", data))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def build_echo_request(identifier: int, sequence: int, payload: bytes = b"wol-scan") -> bytes:
+    """构造ICMP回显请求报文"""
+    header = struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, 0, identifier, sequence)
+    checksum = icmp_checksum(header + payload)
+    return struct.pack("!BBHHH", ICMP_ECHO_REQUEST, 0, checksum, identifier, sequence) + payload
+
+
+def unprivileged_icmp_allowed() -> bool:
+    """检查当前进程的组是否在 ping_group_range 允许范围内"""
+    try:
+        with open(PING_GROUP_RANGE_FILE, 'r') as f:
+            low, high = (int(v) for v in f.read().split())
+    except (OSError, ValueError):
+        return False
+    groups = {os.getgid(), *os.getgroups()}
+    return any(low <= gid <= high for gid in groups)
+
+
+def open_icmp_socket() -> Tuple[socket.socket, bool]:
+    """
+    打开ICMP套接字
+
+    Returns:
+        Tuple[socket.socket, bool]: (非阻塞套接字, 是否为原始套接字)
+
+    Raises:
+        OSError: 非特权和原始套接字均不可用
+    """
+    global _socket_types
+    if _socket_types is None:
+        # 组不在 ping_group_range 内时非特权套接字必然失败，直接优先原始套接字；
+        # 仍保留非特权套接字作为后备（例如没有该内核参数的系统）
+        if unprivileged_icmp_allowed():
+            _socket_types = [(socket.SOCK_DGRAM, False), (socket.SOCK_RAW, True)]
+        else:
+            _socket_types = [(socket.SOCK_RAW, True), (socket.SOCK_DGRAM, False)]
+
+    errors = []
+    for sock_type, raw in _socket_types:
+        try:
+            sock = socket.socket(socket.AF_INET, sock_type, socket.IPPROTO_ICMP)
+        except OSError as e:
+            errors.append(f"{'SOCK_RAW' if raw else 'SOCK_DGRAM'}: {e}")
+            continue
+        sock.setblocking(False)
+        try:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 1 << 20)
+        except OSError:
+            pass
+        return sock, raw
+    raise OSError("无法打开ICMP套接字 (" + "; ".join(errors) + ")")
+
+
+def icmp_available() -> bool:
+    """检查是否可以打开ICMP套接字"""
+    try:
+        sock, _ = open_icmp_socket()
+    except OSError:
+        return False
+    sock.close()
+    return True
+
+
+class IcmpScanner:
+    """使用单个ICMP套接字并发探测多个IPv4主机"""
+
+    def __init__(self, timeout: float = 1.0, rate_limiter=None):
+        self.timeout = timeout
+        # 可选的速率限制器，需提供 async acquire() 方法
+        self.rate_limiter = rate_limiter
+
+    @staticmethod
+    def _parse_reply(data: bytes, raw: bool) -> Optional[Tuple[int, int]]:
+        """解析回显应答，返回(标识符, 序列号)"""
+        view = memoryview(data)
+        if raw:
+            # 原始套接字收到的数据包含IP头
+            if len(view) < 20:
+                return None
+            view = view[(view[0] & 0x0F) * 4:]
+        if len(view) < 8 or view[0] != ICMP_ECHO_REPLY:
+            return None
+        _, _, _, identifier, sequence = struct.unpack_from("!BBHHH", view)
+        return identifier, sequence
+
+    async def iter_alive(self, targets: Iterable[str], timeout: Optional[float] = None,
+                         deadline: Optional[float] = None) -> AsyncIterator[str]:
+        """
+        发送所有探测并按到达顺序产出有回复的主机
+
+        Args:
+            targets: IPv4地址列表
+            timeout: 最后一个探测发出后等待回复的时间
+            deadline: 整体期限（秒），到达后停止等待
+        """
+        timeout = self.timeout if timeout is None else timeout
+        loop = asyncio.get_running_loop()
+        sock, raw = open_icmp_socket()
+        started = time.monotonic()
+        hard_deadline = started + deadline if deadline is not None else None
+
+        try:
+            if raw:
+                identifier = os.getpid() & 0xFFFF
+            else:
+                # 非特权ICMP套接字的标识符由内核按本地"端口"分配
+                sock.bind(("", 0))
+                identifier = sock.getsockname()[1]
+
+            pending = {}  # ip -> 序列号
+            state = {"last_send": started}
+
+            async def send_all():
+                for sequence, ip in enumerate(targets):
+                    sequence &= 0xFFFF
+                    if self.rate_limiter is not None:
+                        await self.rate_limiter.acquire()
+                    pending[ip] = sequence
+                    packet = build_echo_request(identifier, sequence)
+                    try:
+                        await loop.sock_sendto(sock, packet, (ip, 0))
+                    except OSError:
+                        pending.pop(ip, None)
+                    state["last_send"] = time.monotonic()
+
+            sender = loop.create_task(send_all())
+            try:
+                while True:
+                    now = time.monotonic()
+                    if sender.done():
+                        if not pending:
+                            break
+                        wait = state["last_send"] + timeout - now
+                    else:
+                        wait = timeout
+                    if hard_deadline is not None:
+                        wait = min(wait, hard_deadline - now)
+                    if wait <= 0:
+                        break
+
+                    try:
+                        data, address = await asyncio.wait_for(loop.sock_recvfrom(sock, 2048), wait)
+                    except asyncio.TimeoutError:
+                        continue
+
+                    reply = self._parse_reply(data, raw)
+                    if reply is None:
+                        continue
+                    ip = address[0]
+                    if (raw and reply[0] != identifier) or pending.get(ip) != reply[1]:
+                        continue
+                    del pending[ip]
+                    yield ip
+            finally:
+                if not sender.done():
+                    sender.cancel()
+                    try:
+                        await sender
+                    except asyncio.CancelledError:
+                        pass
+        finally:
+            sock.close()
@@ -0,0 +1,180 @@
+"""
+设备清单模块 - 使用SQLite (WAL模式) 持久化发现的设备
+
+设备以MAC地址（48位整数）为主键，IP和主机名建有索引。
+写入在单独的写线程中按批次提交事务，读取使用每线程独立连接，均不占用事件循环。
+"""
+
+import asyncio
+import sqlite3
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS devices (
+    mac INTEGER PRIMARY KEY,
+    ip TEXT NOT NULL DEFAULT '',
+    hostname TEXT NOT NULL DEFAULT '' COLLATE NOCASE,
+    interface TEXT NOT NULL DEFAULT '',
+    first_seen REAL NOT NULL,
+    last_seen REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_devices_ip ON devices(ip);
+CREATE INDEX IF NOT EXISTS idx_devices_hostname ON devices(hostname);
+CREATE INDEX IF NOT EXISTS idx_devices_last_seen ON devices(last_seen);
+"""
+
+UPSERT_SQL = """
+INSERT INTO devices (mac, ip, hostname, interface, first_seen, last_seen)
+VALUES (?, ?, ?, ?, ?, ?)
+ON CONFLICT(mac) DO UPDATE SET
+    ip = CASE WHEN excluded.ip != '' THEN excluded.ip ELSE devices.ip END,
+    hostname = CASE WHEN excluded.hostname != '' THEN excluded.hostname ELSE devices.hostname END,
+    interface = CASE WHEN excluded.interface != '' THEN excluded.interface ELSE devices.interface END,
+    last_seen = MAX(devices.last_seen, excluded.last_seen)
+"""
+
+COLUMNS = "mac, ip, hostname, interface, first_seen, last_seen"
+
+
+def mac_to_int(mac: str) -> Optional[int]:
+    """将MAC地址转换为48位整数，格式无效时返回None"""
+    digits = mac.replace(':', '').replace('-', '').replace('.', '')
+    if len(digits) != 12:
+        return None
+    try:
+        return int(digits, 16)
+    except ValueError:
+        return None
+
+
+def int_to_mac(value: int) -> str:
+    """将48位整数转换为 AA:BB:CC:DD:EE:FF 格式"""
+    digits = f"{value:012X}"
+    return ":".join(digits[i:i + 2] for i in range(0, 12, 2))
+
+
+def _row_to_device(row: tuple) -> Dict[str, Any]:
+    """将查询结果行转换为设备字典"""
+    mac, ip, hostname, interface, first_seen, last_seen = row
+    return {
+        "mac": int_to_mac(mac),
+        "ip": ip,
+        "hostname": hostname,
+        "interface": interface,
+        "first_seen": first_seen,
+        "last_seen": last_seen,
+    }
+
+
+class DeviceInventory:
+    """基于SQLite的设备清单"""
+
+    def __init__(self, path: str = "wol_inventory.db"):
+        self.path = path
+        self._local = threading.local()
+        # 单线程执行器保证写入串行，避免写锁竞争
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="inventory-writer")
+
+        conn = self._connection()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(SCHEMA)
+        conn.commit()
+
+    def _connection(self) -> sqlite3.Connection:
+        """获取当前线程的数据库连接"""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=10)
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA busy_timeout=10000")
+            self._local.conn = conn
+        return conn
+
+    def upsert_many_sync(self, devices: Iterable[Dict[str, Any]], seen_at: Optional[float] = None) -> int:
+        """在一个事务中批量写入设备，没有有效MAC地址的设备会被跳过"""
+        seen_at = time.time() if seen_at is None else seen_at
+        rows = []
+        for device in devices:
+            mac = mac_to_int(device.get("mac") or "")
+            if mac is None:
+                continue
+            rows.append((
+                mac,
+                device.get("ip") or "",
+                device.get("hostname") or "",
+                device.get("interface") or "",
+                seen_at,
+                seen_at,
+            ))
+        if not rows:
+            return 0
+
+        conn = self._connection()
+        with conn:
+            conn.executemany(UPSERT_SQL, rows)
+        return len(rows)
+
+    async def upsert_many(self, devices: Iterable[Dict[str, Any]], seen_at: Optional[float] = None) -> int:
+        """在写线程中批量写入设备"""
+        devices = list(devices)
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._writer, self.upsert_many_sync, devices, seen_at)
+
+    def list_devices_sync(self, query: Optional[str] = None, limit: int = 100,
+                          offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """
+        查询设备清单
+
+        Args:
+            query: 完整MAC地址精确匹配，或按IP/主机名前缀匹配
+            limit: 返回数量上限
+            offset: 偏移量
+
+        Returns:
+            Tuple[List[Dict[str, Any]], int]: (设备列表, 匹配总数)
+        """
+        conn = self._connection()
+        where = ""
+        params: list = []
+
+        if query:
+            query = query.strip()
+            mac = mac_to_int(query)
+            if mac is not None:
+                where = "WHERE mac = ?"
+                params = [mac]
+            else:
+                # 前缀范围查询可以直接使用索引
+                upper = query + "\uffff"
+                where = "WHERE (ip >= ? AND ip < ?) OR (hostname >= ? AND hostname < ?)"
+                params = [query, upper, query, upper]
+
+        total = conn.execute(f"SELECT COUNT(*) FROM devices {where}", params).fetchone()[0]
+        rows = conn.execute(
+            f"SELECT {COLUMNS} FROM devices {where} ORDER BY last_seen DESC LIMIT ? OFFSET ?",
+            params + [limit, offset]
+        ).fetchall()
+        return [_row_to_device(row) for row in rows], total
+
+    async def list_devices(self, query: Optional[str] = None, limit: int = 100,
+                           offset: int = 0) -> Tuple[List[Dict[str, Any]], int]:
+        """在工作线程中查询设备清单"""
+        return await asyncio.to_thread(self.list_devices_sync, query, limit, offset)
+
+    def get_by_ip_sync(self, ip: str) -> Optional[Dict[str, Any]]:
+        """按IP查询最近出现的设备"""
+        row = self._connection().execute(
+            f"SELECT {COLUMNS} FROM devices WHERE ip = ? ORDER BY last_seen DESC LIMIT 1", (ip,)
+        ).fetchone()
+        return _row_to_device(row) if row else None
+
+    async def get_by_ip(self, ip: str) -> Optional[Dict[str, Any]]:
+        """在工作线程中按IP查询最近出现的设备"""
+        return await asyncio.to_thread(self.get_by_ip_sync, ip)
+
+    def close(self):
+        """关闭写线程"""
+        self._writer.shutdown(wait=True)
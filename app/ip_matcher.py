@@ -0,0 +1,124 @@
+"""
+IP匹配模块 - 将IP/CIDR列表编译为有序整数区间，按二分查找判断地址是否命中
+
+IPv4 和 IPv6 分别编译，重叠或相邻的区间在编译时合并。匹配器创建后不可修改，
+列表变化时重新编译并整体替换引用，读取方不会看到编译到一半的状态。
+DecisionCache 按客户端IP缓存匹配结果，列表变化时递增代数使全部缓存失效。
+"""
+
+import bisect
+import ipaddress
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Iterable, List, Tuple
+
+
+def _merge_intervals(intervals: List[Tuple[int, int]]) -> Tuple[List[int], List[int]]:
+    """合并重叠或相邻的区间，返回 (起点列表, 终点列表)"""
+    starts: List[int] = []
+    ends: List[int] = []
+    for start, end in sorted(intervals):
+        if ends and start <= ends[-1] + 1:
+            ends[-1] = max(ends[-1], end)
+        else:
+            starts.append(start)
+            ends.append(end)
+    return starts, ends
+
+
+class CidrMatcher:
+    """编译后的IP/CIDR匹配器"""
+
+    __slots__ = ("_v4_starts", "_v4_ends", "_v6_starts", "_v6_ends", "invalid")
+
+    def __init__(self, entries: Iterable[str] = ()):
+        v4: List[Tuple[int, int]] = []
+        v6: List[Tuple[int, int]] = []
+        # 无法解析的条目（与逐条匹配时一样被忽略）
+        self.invalid: List[str] = []
+        for entry in entries:
+            try:
+                if '/' in entry:
+                    network = ipaddress.ip_network(entry, strict=False)
+                    interval = (int(network.network_address), int(network.broadcast_address))
+                    version = network.version
+                else:
+                    address = ipaddress.ip_address(entry)
+                    interval = (int(address), int(address))
+                    version = address.version
+            except ValueError:
+                self.invalid.append(entry)
+                continue
+            (v4 if version == 4 else v6).append(interval)
+
+        self._v4_starts, self._v4_ends = _merge_intervals(v4)
+        self._v6_starts, self._v6_ends = _merge_intervals(v6)
+
+    def contains(self, ip: str) -> bool:
+        """地址是否命中任一条目，无效地址返回False"""
+        try:
+            address = ipaddress.ip_address(ip)
+        except ValueError:
+            return False
+        if address.version == 4:
+            starts, ends = self._v4_starts, self._v4_ends
+        else:
+            starts, ends = self._v6_starts, self._v6_ends
+        value = int(address)
+        index = bisect.bisect_right(starts, value) - 1
+        return index >= 0 and value <= ends[index]
+
+
+class DecisionCache:
+    """
+    有界LRU判定缓存 - 客户端IP -> (代数, 是否命中)
+
+    每个结果记录计算时的代数，代数变化后旧结果视为未命中；
+    因此与 invalidate() 并发计算出的旧结果也不会被使用。
+    """
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self.generation = 0
+        self.hits = 0
+        self.misses = 0
+        self._entries: "OrderedDict[str, Tuple[int, bool]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def lookup(self, ip: str, decide: Callable[[str], bool]) -> bool:
+        """返回缓存的判定结果，未命中时调用 decide(ip) 计算并缓存"""
+        with self._lock:
+            generation = self.generation
+            entry = self._entries.get(ip)
+            if entry is not None and entry[0] == generation:
+                self._entries.move_to_end(ip)
+                self.hits += 1
+                return entry[1]
+            self.misses += 1
+
+        decision = decide(ip)
+        with self._lock:
+            self._entries[ip] = (generation, decision)
+            self._entries.move_to_end(ip)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return decision
+
+    def invalidate(self):
+        """递增代数并清空缓存"""
+        with self._lock:
+            self.generation += 1
+            self._entries.clear()
+
+    def stats(self) -> Dict[str, Any]:
+        """缓存统计"""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entries),
+                "max_entries": self.max_entries,
+                "generation": self.generation,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0
+            }
@@ -1,12 +1,13 @@
-from fastapi import FastAPI, HTTPException, Depends, Request, Form
+from fastapi import FastAPI, HTTPException, Depends, Request, Form, status
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
-from fastapi.security import HTTPBearer
+from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
 import time
 import os
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Optional
 from app.models import (
     WakeRequest, AdvancedWakeRequest, WakeResponse,
     InterfacesResponse, HealthResponse,
@@ -21,7 +22,8 @@ from app.auth import (
     generate_captcha, verify_captcha, cleanup_expired_captchas,
     cleanup_expired_sessions, get_client_ip, is_ip_in_whitelist,
     add_ip_to_whitelist, remove_ip_from_whitelist, get_ip_whitelist,
-    validate_ip_format
+    validate_ip_format, get_whitelist_cache_stats, revoke_token, security,
+    captcha_pool, get_captcha_pool_stats
 )
 
 # 应用启动时间
@@ -80,6 +82,19 @@ app = FastAPI(
     # lifespan=lifespan
 )
 
+
+@app.on_event("startup")
+async def start_captcha_pool():
+    """启动预渲染验证码池的后台补充线程"""
+    captcha_pool.start()
+
+
+@app.on_event("shutdown")
+async def stop_captcha_pool():
+    """停止验证码池的补充线程"""
+    captcha_pool.stop()
+
+
 # 添加CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -187,6 +202,18 @@ async def get_captcha():
         raise HTTPException(status_code=500, detail=f"生成验证码失败: {str(e)}")
 
 
+@app.get("/api/captcha/pool", summary="验证码池统计", description="获取预渲染验证码池的大小、可用数和同步渲染次数")
+async def get_captcha_pool(current_user: dict = Depends(get_current_user)):
+    """获取验证码池统计"""
+    # 只有通过token认证的用户才能查看
+    if current_user.get("auth_type") == "whitelist":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="白名单用户无法查看验证码池"
+        )
+    return get_captcha_pool_stats()
+
+
 @app.post("/api/login", response_model=LoginResponse, summary="用户登录", description="使用账号密码和验证码登录")
 async def login(request: LoginRequest):
     """用户登录"""
@@ -231,8 +258,16 @@ async def get_user_info(current_user: dict = Depends(get_current_user)):
 
 
 @app.post("/api/logout", summary="用户登出", description="退出登录")
-async def logout():
+async def logout(
+    request: Request,
+    credentials: Optional[HTTPAuthorizationCredentials] = Depends(security)
+):
     """用户登出"""
+    # 吊销当前令牌，避免缓存或他处保存的令牌在过期前继续可用
+    token = credentials.credentials if credentials else request.cookies.get("access_token")
+    if token:
+        revoke_token(token)
+
     # 清理过期的会话和验证码
     cleanup_expired_sessions()
     cleanup_expired_captchas()
@@ -269,6 +304,18 @@ async def get_whitelist(current_user: dict = Depends(get_current_user)):
         raise HTTPException(status_code=500, detail=f"获取白名单失败: {str(e)}")
 
 
+@app.get("/api/whitelist/cache", summary="白名单判定缓存统计", description="获取白名单判定缓存的大小、代数和命中率")
+async def get_whitelist_cache(current_user: dict = Depends(get_current_user)):
+    """获取白名单判定缓存统计"""
+    # 只有通过token认证的用户才能查看
+    if current_user.get("auth_type") == "whitelist":
+        raise HTTPException(
+            status_code=status.HTTP_403_FORBIDDEN,
+            detail="白名单用户无法查看白名单缓存"
+        )
+    return get_whitelist_cache_stats()
+
+
 @app.post("/api/whitelist/add", response_model=IPWhitelistOperationResponse, summary="添加IP到白名单", description="添加IP地址或CIDR网段到白名单")
 async def add_ip_whitelist(request: AddIPRequest, current_user: dict = Depends(get_current_user)):
     """添加IP到白名单"""
@@ -0,0 +1,266 @@
+"""
+邻居表读取模块 - 直接读取内核的IP→MAC映射，无需调用arp命令
+
+支持两种来源：
+- /proc/net/arp：仅IPv4，包含标志位和接口
+- rtnetlink RTM_GETNEIGH：IPv4和IPv6，包含NUD状态和确认/使用/更新时间
+"""
+
+import ipaddress
+import os
+import socket
+import struct
+import sys
+import time
+from typing import Dict, Any, List, Optional
+
+PROC_NET_ARP = "/proc/net/arp"
+
+# /proc/net/arp 中的标志位 (include/uapi/linux/if_arp.h)
+ATF_COM = 0x02   # 已解析完成
+ATF_PERM = 0x04  # 静态条目
+
+_EMPTY_MAC = "00:00:00:00:00:00"
+
+
+def proc_arp_available(path: str = PROC_NET_ARP) -> bool:
+    """检查 /proc/net/arp 是否可读"""
+    return os.access(path, os.R_OK)
+
+
+def read_proc_arp(path: str = PROC_NET_ARP) -> List[Dict[str, Any]]:
+    """
+    解析 /proc/net/arp
+
+    一次读取整个文件后逐行切分，只保留已解析完成的条目。
+
+    Returns:
+        List[Dict[str, Any]]: [{"ip", "mac", "hostname", "flags", "interface"}, ...]
+    """
+    with open(path, 'r') as f:
+        lines = f.read().splitlines()
+
+    entries = []
+    # 列: IP address, HW type, Flags, HW address, Mask, Device
+    for line in lines[1:]:
+        fields = line.split()
+        if len(fields) < 6:
+            continue
+        flags = int(fields[2], 16)
+        mac = fields[3]
+        if not flags & ATF_COM or mac == _EMPTY_MAC:
+            continue
+        entries.append({
+            "ip": fields[0],
+            "mac": mac.upper(),
+            "hostname": "",
+            "flags": flags,
+            "interface": fields[5],
+        })
+    return entries
+
+
+# ---------------------------------------------------------------------------
+# rtnetlink 邻居表 (RTM_GETNEIGH)
+# ---------------------------------------------------------------------------
+
+NETLINK_ROUTE = 0
+RTM_NEWNEIGH = 28
+RTM_GETNEIGH = 30
+NLMSG_ERROR = 2
+NLMSG_DONE = 3
+NLM_F_REQUEST = 0x01
+NLM_F_DUMP = 0x300
+
+NDA_DST = 1
+NDA_LLADDR = 2
+NDA_CACHEINFO = 3
+
+_NLMSGHDR = struct.Struct("=IHHII")
+_NDMSG = struct.Struct("=BxxxiHBB")
+_RTATTR = struct.Struct("=HH")
+_NDA_CACHEINFO = struct.Struct("=IIII")
+
+# 邻居状态 (NUD_*)
+NUD_STATES = {
+    0x01: "INCOMPLETE",
+    0x02: "REACHABLE",
+    0x04: "STALE",
+    0x08: "DELAY",
+    0x10: "PROBE",
+    0x20: "FAILED",
+    0x40: "NOARP",
+    0x80: "PERMANENT",
+}
+
+# 不能提供有效MAC映射的状态
+UNRESOLVED_STATES = {"NONE", "INCOMPLETE", "FAILED"}
+
+_FAMILY_NAMES = {socket.AF_INET: "AF_INET", socket.AF_INET6: "AF_INET6"}
+
+
+def is_resolved_neighbor(entry: Dict[str, Any]) -> bool:
+    """判断邻居条目是否提供了有效的单播MAC映射"""
+    return (bool(entry["mac"]) and entry["mac"] != _EMPTY_MAC
+            and entry["state"] not in UNRESOLVED_STATES and "NOARP" not in entry["state"])
+
+
+def netlink_available() -> bool:
+    """检查当前系统是否支持rtnetlink"""
+    return hasattr(socket, "AF_NETLINK") and sys.platform.startswith("linux")
+
+
+def _nud_state_name(state: int) -> str:
+    """将NUD状态位转换为名称"""
+    if not state:
+        return "NONE"
+    return "|".join(name for bit, name in NUD_STATES.items() if state & bit)
+
+
+def _format_mac(lladdr: bytes) -> str:
+    """格式化链路层地址"""
+    return ":".join(f"{b:02X}" for b in lladdr)
+
+
+def _parse_neigh_message(view: memoryview, clock_ticks: int, if_names: Dict[int, str]) -> Optional[Dict[str, Any]]:
+    """解析单条 RTM_NEWNEIGH 消息体（ndmsg + 属性）"""
+    family, ifindex, state, ndm_flags, _ = _NDMSG.unpack_from(view)
+    if family not in _FAMILY_NAMES:
+        return None
+
+    ip = None
+    mac = ""
+    cacheinfo = None
+    offset = _NDMSG.size
+    while offset + _RTATTR.size <= len(view):
+        rta_len, rta_type = _RTATTR.unpack_from(view, offset)
+        if rta_len < _RTATTR.size:
+            break
+        payload = view[offset + _RTATTR.size:offset + rta_len]
+        if rta_type == NDA_DST:
+            ip = socket.inet_ntop(family, payload)
+        elif rta_type == NDA_LLADDR and len(payload) == 6:
+            mac = _format_mac(payload)
+        elif rta_type == NDA_CACHEINFO and len(payload) >= _NDA_CACHEINFO.size:
+            cacheinfo = _NDA_CACHEINFO.unpack_from(payload)
+        offset += (rta_len + 3) & ~3
+
+    if ip is None:
+        return None
+
+    if ifindex not in if_names:
+        try:
+            if_names[ifindex] = socket.if_indextoname(ifindex)
+        except OSError:
+            if_names[ifindex] = str(ifindex)
+
+    entry = {
+        "ip": ip,
+        "mac": mac,
+        "hostname": "",
+        "family": _FAMILY_NAMES[family],
+        "interface": if_names[ifindex],
+        "state": _nud_state_name(state),
+        "flags": ndm_flags,
+        # 距离上次确认/使用/更新的秒数
+        "confirmed_age": None,
+        "used_age": None,
+        "updated_age": None,
+    }
+    if cacheinfo is not None:
+        confirmed, used, updated, _ = cacheinfo
+        entry["confirmed_age"] = confirmed / clock_ticks
+        entry["used_age"] = used / clock_ticks
+        entry["updated_age"] = updated / clock_ticks
+    return entry
+
+
+def dump_neighbors(family: int = socket.AF_UNSPEC, timeout: float = 2.0) -> List[Dict[str, Any]]:
+    """
+    通过一次 RTM_GETNEIGH 转储读取所有接口、所有地址族的邻居表
+
+    Args:
+        family: 地址族，默认 AF_UNSPEC 表示IPv4和IPv6
+        timeout: 读取超时时间（秒）
+
+    Returns:
+        List[Dict[str, Any]]: 邻居条目，包含 ip、mac、family、interface、state 和各项时间（秒）
+
+    Raises:
+        OSError: netlink 不可用或内核返回错误
+    """
+    clock_ticks = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+    if_names: Dict[int, str] = {}
+    entries = []
+
+    with socket.socket(socket.AF_NETLINK, socket.SOCK_RAW, NETLINK_ROUTE) as sock:
+        sock.settimeout(timeout)
+        sock.bind((0, 0))
+        sequence = int(time.time()) & 0xFFFFFFFF
+        body = _NDMSG.pack(family, 0, 0, 0, 0)
+        header = _NLMSGHDR.pack(_NLMSGHDR.size + len(body), RTM_GETNEIGH,
+                                NLM_F_REQUEST | NLM_F_DUMP, sequence, 0)
+        sock.send(header + body)
+
+        while True:
+            data = sock.recv(1 << 16)
+            view = memoryview(data)
+            offset = 0
+            while offset + _NLMSGHDR.size <= len(view):
+                msg_len, msg_type, _, msg_seq, _ = _NLMSGHDR.unpack_from(view, offset)
+                if msg_len < _NLMSGHDR.size:
+                    return entries
+                if msg_seq == sequence:
+                    if msg_type == NLMSG_DONE:
+                        return entries
+                    if msg_type == NLMSG_ERROR:
+                        error = -struct.unpack_from("=i", view, offset + _NLMSGHDR.size)[0]
+                        if error:
+                            raise OSError(error, os.strerror(error))
+                    elif msg_type == RTM_NEWNEIGH:
+                        entry = _parse_neigh_message(
+                            view[offset + _NLMSGHDR.size:offset + msg_len], clock_ticks, if_names)
+                        if entry is not None:
+                            entries.append(entry)
+                offset += (msg_len + 3) & ~3
+
+
+def read_neighbor_table() -> List[Dict[str, Any]]:
+    """
+    读取IPv4邻居表中已解析的条目，供设备发现使用
+
+    优先使用rtnetlink（包含状态和时间信息），失败时读取 /proc/net/arp。
+    非Linux系统返回空列表，由调用方使用arp命令。
+    """
+    if netlink_available():
+        try:
+            return [
+                entry for entry in dump_neighbors(socket.AF_INET) if is_resolved_neighbor(entry)
+            ]
+        except OSError as e:
+            print(f"读取netlink邻居表失败: {e}")
+    if proc_arp_available():
+        return read_proc_arp()
+    return []
+
+
+def lookup_neighbor_mac(ip: str) -> Optional[Dict[str, Any]]:
+    """在邻居表中查找IP对应的MAC地址（支持IPv4和IPv6），用于按IP唤醒"""
+    try:
+        normalized = str(ipaddress.ip_address(ip))
+    except ValueError:
+        return None
+
+    if netlink_available():
+        try:
+            for entry in dump_neighbors():
+                if entry["ip"] == normalized and is_resolved_neighbor(entry):
+                    return entry
+            return None
+        except OSError as e:
+            print(f"读取netlink邻居表失败: {e}")
+    if proc_arp_available():
+        for entry in read_proc_arp():
+            if entry["ip"] == normalized:
+                return entry
+    return None
@@ -0,0 +1,102 @@
+"""
+网络后端模块 - 设备发现所依赖的底层网络操作接口
+
+发现流水线通过后端读取邻居表（ARP表）和探测主机。系统后端使用真实的套接字和邻居表，
+模拟后端在内存中生成主机，按配置的延迟和丢包率应答，用于在没有真实局域网时测量发现性能。
+"""
+
+import asyncio
+import ipaddress
+from abc import ABC, abstractmethod
+import random
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional, Sequence, Tuple
+
+
+class NetworkBackend(ABC):
+    """网络后端接口，子类必须实现 read_neighbors 和 iter_probe"""
+
+    name = "base"
+
+    @abstractmethod
+    def read_neighbors(self) -> List[Dict[str, Any]]:
+        """读取邻居表，返回 [{"ip", "mac", "hostname", ...}]"""
+
+    @abstractmethod
+    def iter_probe(self, hosts: List[str], concurrency: int, timeout: float, deadline: float,
+                   arp_source: Optional[Tuple[str, str]] = None) -> AsyncIterator[Tuple[str, str]]:
+        """探测一批主机，按应答顺序产出 (IP, MAC)，无法直接得到MAC时MAC为空"""
+
+    def scan_networks(self) -> Optional[List[ipaddress.IPv4Network]]:
+        """后端自带的待扫描网段，返回None时使用本机网络接口所在的网段"""
+        return None
+
+
+class SimulatedBackend(NetworkBackend):
+    """
+    模拟网络后端
+
+    每个网段按 density 随机生成在线主机（由 seed 决定，可重复），每次探测按 latency 范围内的
+    随机延迟应答，按 loss 概率丢失。arp=True 时探测直接返回MAC（模拟直连网段的ARP扫描），
+    否则只返回IP，应答过的主机随后出现在邻居表中（模拟内核ARP缓存），由MAC补充阶段关联。
+    """
+
+    name = "simulated"
+
+    def __init__(self, networks: Sequence[str], density: float = 0.2,
+                 latency: Tuple[float, float] = (0.001, 0.02), loss: float = 0.0,
+                 seed: int = 0, arp: bool = False, neighbor_fraction: float = 0.1,
+                 timeout: Optional[float] = None):
+        self.networks = [ipaddress.IPv4Network(n, strict=False) for n in networks]
+        self.latency = latency
+        self.loss = loss
+        self.arp = arp
+        # 覆盖探测等待时间（秒），用于压缩基准测试的时间
+        self.timeout = timeout
+        self._random = random.Random(seed)
+        self.hosts: Dict[str, str] = {}
+        for network in self.networks:
+            first = int(network.network_address) + (1 if network.prefixlen < 31 else 0)
+            count = network.num_addresses - (2 if network.prefixlen < 31 else 0)
+            for offset in self._random.sample(range(count), int(count * density)):
+                ip = str(ipaddress.IPv4Address(first + offset))
+                self.hosts[ip] = "02:%02X:%02X:%02X:%02X:%02X" % tuple(self._random.getrandbits(8) for _ in range(5))
+        # 初始邻居表中只有部分主机
+        self.neighbors: Dict[str, str] = {
+            ip: mac for ip, mac in self.hosts.items() if self._random.random() < neighbor_fraction
+        }
+
+    def read_neighbors(self) -> List[Dict[str, Any]]:
+        return [{"ip": ip, "mac": mac, "hostname": ""} for ip, mac in self.neighbors.items()]
+
+    def scan_networks(self) -> Optional[List[ipaddress.IPv4Network]]:
+        return list(self.networks)
+
+    async def iter_probe(self, hosts: List[str], concurrency: int, timeout: float, deadline: float,
+                         arp_source: Optional[Tuple[str, str]] = None) -> AsyncIterator[Tuple[str, str]]:
+        if not hosts:
+            return
+        timeout = self.timeout if self.timeout is not None else timeout
+        low, high = self.latency
+        replies = sorted(
+            (self._random.uniform(low, high), ip) for ip in hosts
+            if ip in self.hosts and self._random.random() >= self.loss
+        )
+        # 所有主机都应答时提前结束，否则等待到超时
+        wait_until = replies[-1][0] if len(replies) == len(hosts) else timeout
+        wait_until = min(wait_until, deadline)
+
+        started = time.monotonic()
+        for delay, ip in replies:
+            if delay > wait_until:
+                break
+            remaining = started + delay - time.monotonic()
+            if remaining > 0:
+                await asyncio.sleep(remaining)
+            mac = self.hosts[ip]
+            self.neighbors[ip] = mac
+            yield ip, (mac if self.arp else "")
+
+        remaining = started + wait_until - time.monotonic()
+        if remaining > 0:
+            await asyncio.sleep(remaining)
@@ -0,0 +1,184 @@
+"""
+OUI厂商索引模块 - 将IEEE OUI数据库编译为定长记录的有序二进制文件，运行时内存映射并二分查找
+
+文件格式（大端）：
+    头部 16 字节: 魔数 b"WOUI", 版本(u16), 保留(u16), 记录数(u32), 名称区偏移(u32)
+    记录区: 每条 8 字节, 24位前缀(u32) + 名称在名称区内的偏移(u32), 按前缀升序
+    名称区: 每个名称为 长度(u8) + UTF-8 字节, 相同名称只存一份
+
+编译:
+    python -m app.oui build oui.csv app/data/oui.bin
+    python -m app.oui build https://standards-oui.ieee.org/oui/oui.csv app/data/oui.bin
+"""
+
+import bisect
+import csv
+import io
+import mmap
+import os
+import re
+import struct
+import sys
+import urllib.request
+from typing import Dict, Iterable, Optional
+
+MAGIC = b"WOUI"
+VERSION = 1
+_HEADER = struct.Struct(">4sHHII")
+_RECORD = struct.Struct(">II")
+
+DEFAULT_OUI_PATH = os.path.join(os.path.dirname(__file__), "data", "oui.bin")
+
+# oui.txt 中的 "001122     (base 16)		厂商名" 行
+_TXT_LINE = re.compile(r"^\s*([0-9A-Fa-f]{6})\s+\(base 16\)\s+(.+?)\s*$")
+
+
+def parse_oui_source(text: str) -> Dict[int, str]:
+    """解析IEEE oui.csv 或 oui.txt 内容，返回 {24位前缀: 厂商名}"""
+    entries = {}
+    if text.lstrip().startswith("Registry,"):
+        for row in csv.reader(io.StringIO(text)):
+            if len(row) < 3 or row[0] == "Registry":
+                continue
+            try:
+                entries[int(row[1], 16)] = row[2].strip()
+            except ValueError:
+                continue
+    else:
+        for line in text.splitlines():
+            match = _TXT_LINE.match(line)
+            if match:
+                entries[int(match.group(1), 16)] = match.group(2)
+    return entries
+
+
+def compile_oui(entries: Dict[int, str]) -> bytes:
+    """将 {前缀: 厂商名} 编译为二进制索引"""
+    records = bytearray()
+    names = bytearray()
+    name_offsets: Dict[str, int] = {}
+
+    for prefix in sorted(entries):
+        name = entries[prefix]
+        offset = name_offsets.get(name)
+        if offset is None:
+            encoded = name.encode("utf-8")[:255]
+            offset = name_offsets[name] = len(names)
+            names.append(len(encoded))
+            names += encoded
+        records += _RECORD.pack(prefix, offset)
+
+    header = _HEADER.pack(MAGIC, VERSION, 0, len(entries), _HEADER.size + len(records))
+    return header + bytes(records) + bytes(names)
+
+
+class _PrefixSequence:
+    """以序列形式暴露记录区中的前缀，供 bisect 使用"""
+
+    __slots__ = ("buf", "count")
+
+    def __init__(self, buf, count: int):
+        self.buf = buf
+        self.count = count
+
+    def __len__(self) -> int:
+        return self.count
+
+    def __getitem__(self, index: int) -> int:
+        return _RECORD.unpack_from(self.buf, _HEADER.size + index * _RECORD.size)[0]
+
+
+class OuiIndex:
+    """内存映射的OUI索引"""
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, version, _, count, names_offset = _HEADER.unpack_from(self._mmap)
+        except struct.error:
+            self._mmap.close()
+            raise ValueError(f"OUI索引文件不完整: {path}")
+        if magic != MAGIC or version != VERSION:
+            self._mmap.close()
+            raise ValueError(f"不是有效的OUI索引文件: {path}")
+        # 记录区和名称区必须完整位于文件内，查找时才不会越界
+        if not _HEADER.size + count * _RECORD.size <= names_offset <= len(self._mmap):
+            self._mmap.close()
+            raise ValueError(f"OUI索引文件已损坏: {path}")
+        self.count = count
+        self._names_offset = names_offset
+        self._prefixes = _PrefixSequence(self._mmap, count)
+
+    def lookup(self, mac: str) -> Optional[str]:
+        """按MAC地址前24位查找厂商名"""
+        digits = mac.replace(":", "").replace("-", "").replace(".", "")[:6]
+        if len(digits) != 6:
+            return None
+        try:
+            prefix = int(digits, 16)
+        except ValueError:
+            return None
+
+        index = bisect.bisect_left(self._prefixes, prefix)
+        if index >= self.count or self._prefixes[index] != prefix:
+            return None
+        _, name_offset = _RECORD.unpack_from(self._mmap, _HEADER.size + index * _RECORD.size)
+        start = self._names_offset + name_offset
+        if start >= len(self._mmap):
+            return None
+        length = self._mmap[start]
+        return self._mmap[start + 1:start + 1 + length].decode("utf-8", errors="replace")
+
+    def close(self):
+        """关闭内存映射"""
+        self._mmap.close()
+
+
+def load_oui_index(path: str = DEFAULT_OUI_PATH) -> Optional[OuiIndex]:
+    """加载OUI索引，文件不存在或无效时返回None"""
+    if not os.path.exists(path):
+        return None
+    try:
+        return OuiIndex(path)
+    except (OSError, ValueError, struct.error) as e:
+        print(f"加载OUI索引失败: {e}")
+        return None
+
+
+def _read_source(source: str) -> str:
+    """读取本地文件或URL"""
+    if source.startswith(("http://", "https://")):
+        request = urllib.request.Request(source, headers={"User-Agent": "wake-on-lan-service"})
+        with urllib.request.urlopen(request, timeout=60) as response:
+            return response.read().decode("utf-8", errors="replace")
+    with open(source, "r", encoding="utf-8", errors="replace") as f:
+        return f.read()
+
+
+def main(argv: Iterable[str]) -> int:
+    """命令行入口"""
+    args = list(argv)
+    if len(args) != 3 or args[0] != "build":
+        print("用法: python -m app.oui build <oui.csv|oui.txt|URL> <输出文件>")
+        return 2
+
+    _, source, output = args
+    entries = parse_oui_source(_read_source(source))
+    if not entries:
+        print(f"未从 {source} 解析到任何OUI记录")
+        return 1
+
+    data = compile_oui(entries)
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    tmp_path = f"{output}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, output)
+    print(f"已编译 {len(entries)} 条OUI记录到 {output} ({len(data)} 字节)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,298 @@
+"""
+被动监听模块 - 从 mDNS、NetBIOS 名称广播和 DHCP 请求中收集 主机名/MAC/IP 对应关系
+
+主机会不断主动宣告自己：mDNS 响应中的A记录、NetBIOS 名称注册/刷新广播、DHCP 请求中的
+客户端MAC、主机名和请求地址。监听这些报文无需任何探测即可保持设备列表新鲜。
+报文通过 memoryview 原地解析，不做切片拷贝。
+"""
+
+import asyncio
+import socket
+import struct
+import time
+from typing import Any, Awaitable, Callable, Dict, Iterable, List, Optional, Tuple
+
+MDNS_GROUP = "224.0.0.251"
+MDNS_PORT = 5353
+NETBIOS_NS_PORT = 137
+DHCP_SERVER_PORT = 67
+
+DNS_TYPE_A = 1
+NETBIOS_TYPE_NB = 0x20
+# NetBIOS 名称注册(5)、刷新(8/9)
+NETBIOS_ANNOUNCE_OPCODES = {5, 8, 9}
+
+DHCP_MAGIC_COOKIE = 0x63825363
+DHCP_OPTION_HOSTNAME = 12
+DHCP_OPTION_REQUESTED_IP = 50
+DHCP_OPTION_END = 255
+
+_DNS_HEADER = struct.Struct("!HHHHHH")
+_RR_FIXED = struct.Struct("!HHIH")
+
+Observation = Dict[str, str]
+
+
+def _read_dns_name(buf: memoryview, offset: int) -> Tuple[str, int]:
+    """读取DNS名称（支持压缩指针），返回 (名称, 名称之后的偏移)"""
+    labels = []
+    end = None
+    hops = 0
+    while True:
+        length = buf[offset]
+        if length & 0xC0 == 0xC0:
+            if end is None:
+                end = offset + 2
+            hops += 1
+            if hops > 32:
+                raise ValueError("DNS名称压缩指针循环")
+            offset = ((length & 0x3F) << 8) | buf[offset + 1]
+            continue
+        offset += 1
+        if length == 0:
+            break
+        labels.append(str(buf[offset:offset + length], "utf-8", "replace"))
+        offset += length
+    return ".".join(labels), (end if end is not None else offset)
+
+
+def _iter_resource_records(buf: memoryview, offset: int, count: int):
+    """遍历资源记录，产出 (名称, 类型, 数据起始偏移, 数据长度)"""
+    for _ in range(count):
+        name, offset = _read_dns_name(buf, offset)
+        rtype, _, _, rdlength = _RR_FIXED.unpack_from(buf, offset)
+        offset += _RR_FIXED.size
+        if offset + rdlength > len(buf):
+            raise ValueError("资源记录长度超出报文")
+        yield name, rtype, offset, rdlength
+        offset += rdlength
+
+
+def parse_mdns(buf: memoryview, source_ip: str) -> List[Observation]:
+    """解析mDNS响应中 *.local 的A记录"""
+    _, flags, qdcount, ancount, nscount, arcount = _DNS_HEADER.unpack_from(buf)
+    if not flags & 0x8000:
+        return []
+    offset = _DNS_HEADER.size
+    for _ in range(qdcount):
+        _, offset = _read_dns_name(buf, offset)
+        offset += 4
+
+    observations = []
+    for name, rtype, start, length in _iter_resource_records(buf, offset, ancount + nscount + arcount):
+        if rtype == DNS_TYPE_A and length == 4 and name.lower().endswith(".local"):
+            observations.append({"ip": socket.inet_ntoa(buf[start:start + 4]), "mac": "", "hostname": name[:-6]})
+    return observations
+
+
+def decode_netbios_name(encoded: str) -> Tuple[str, int]:
+    """解码NetBIOS一级编码名称，返回 (名称, 后缀字节)"""
+    if len(encoded) != 32:
+        raise ValueError("NetBIOS名称长度无效")
+    raw = bytes(((ord(encoded[i]) - 0x41) << 4) | (ord(encoded[i + 1]) - 0x41) for i in range(0, 32, 2))
+    return raw[:15].decode("ascii", errors="replace").rstrip(" \x00"), raw[15]
+
+
+def parse_netbios(buf: memoryview, source_ip: str) -> List[Observation]:
+    """解析NetBIOS名称注册/刷新广播中的工作站名称（后缀0x00，非组名）"""
+    _, flags, qdcount, ancount, nscount, arcount = _DNS_HEADER.unpack_from(buf)
+    if flags & 0x8000 or (flags >> 11) & 0x0F not in NETBIOS_ANNOUNCE_OPCODES or qdcount != 1:
+        return []
+    encoded, offset = _read_dns_name(buf, _DNS_HEADER.size)
+    name, suffix = decode_netbios_name(encoded.split(".", 1)[0])
+    offset += 4
+    if suffix != 0x00 or not name:
+        return []
+
+    ip = source_ip
+    for _, rtype, start, length in _iter_resource_records(buf, offset, ancount + nscount + arcount):
+        if rtype == NETBIOS_TYPE_NB and length >= 6:
+            nb_flags = struct.unpack_from("!H", buf, start)[0]
+            if nb_flags & 0x8000:
+                return []
+            ip = socket.inet_ntoa(buf[start + 2:start + 6])
+            break
+    return [{"ip": ip, "mac": "", "hostname": name}]
+
+
+def parse_dhcp(buf: memoryview, source_ip: str) -> List[Observation]:
+    """解析DHCP请求中的客户端MAC、主机名和（已有或请求的）IP地址"""
+    if len(buf) < 240 or buf[0] != 1 or buf[1] != 1 or buf[2] != 6:
+        return []
+    if struct.unpack_from("!I", buf, 236)[0] != DHCP_MAGIC_COOKIE:
+        return []
+
+    mac = ":".join(f"{b:02X}" for b in buf[28:34])
+    ciaddr = buf[12:16]
+    ip = socket.inet_ntoa(ciaddr) if any(ciaddr) else ""
+    hostname = ""
+
+    offset = 240
+    while offset < len(buf):
+        code = buf[offset]
+        if code == DHCP_OPTION_END:
+            break
+        if code == 0:
+            offset += 1
+            continue
+        length = buf[offset + 1]
+        start = offset + 2
+        if code == DHCP_OPTION_HOSTNAME:
+            hostname = str(buf[start:start + length], "utf-8", "replace").rstrip("\x00")
+        elif code == DHCP_OPTION_REQUESTED_IP and length == 4 and not ip:
+            ip = socket.inet_ntoa(buf[start:start + 4])
+        offset = start + length
+
+    if not ip:
+        return []
+    return [{"ip": ip, "mac": mac, "hostname": hostname}]
+
+
+class ObservationStore:
+    """被动观测结果，以IP为键，容量有限（淘汰最久未见的条目）"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._entries: Dict[str, Dict[str, Any]] = {}
+        self._dirty: Dict[str, Dict[str, Any]] = {}
+
+    def observe(self, ip: str, mac: str = "", hostname: str = "", source: str = ""):
+        """记录一次观测，已知字段不会被空值覆盖"""
+        entry = self._entries.pop(ip, None)
+        if entry is None:
+            if len(self._entries) >= self.max_entries:
+                self._entries.pop(next(iter(self._entries)))
+            entry = {"ip": ip, "mac": "", "hostname": "", "source": source}
+        changed = False
+        if mac and entry["mac"] != mac:
+            entry["mac"] = mac
+            changed = True
+        if hostname and entry["hostname"] != hostname:
+            entry["hostname"] = hostname
+            changed = True
+        entry["source"] = source or entry["source"]
+        entry["last_seen"] = time.time()
+        # 重新插入，字典顺序即最近观测顺序
+        self._entries[ip] = entry
+        if changed:
+            self._dirty[ip] = entry
+
+    def get(self, ip: str) -> Optional[Dict[str, Any]]:
+        """按IP获取观测结果"""
+        return self._entries.get(ip)
+
+    def devices(self) -> List[Dict[str, Any]]:
+        """所有观测结果"""
+        return [dict(entry) for entry in self._entries.values()]
+
+    def pop_dirty(self) -> List[Dict[str, Any]]:
+        """取出上次调用后有变化的条目"""
+        dirty = [dict(entry) for entry in self._dirty.values()]
+        self._dirty.clear()
+        return dirty
+
+
+class _PassiveProtocol(asyncio.DatagramProtocol):
+    """将收到的报文交给解析函数并写入观测存储"""
+
+    def __init__(self, parser: Callable[[memoryview, str], List[Observation]],
+                 store: ObservationStore, source: str):
+        self.parser = parser
+        self.store = store
+        self.source = source
+
+    def datagram_received(self, data: bytes, addr):
+        try:
+            observations = self.parser(memoryview(data), addr[0])
+        except (ValueError, IndexError, struct.error, OSError):
+            return
+        for observation in observations:
+            self.store.observe(source=self.source, **observation)
+
+
+def _open_udp_socket(port: int, multicast_group: Optional[str] = None) -> socket.socket:
+    """打开可与系统其他服务共用端口的UDP监听套接字"""
+    sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+    try:
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, "SO_REUSEPORT"):
+            try:
+                sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)
+            except OSError:
+                pass
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_BROADCAST, 1)
+        sock.bind(("", port))
+        if multicast_group:
+            mreq = socket.inet_aton(multicast_group) + socket.inet_aton("0.0.0.0")
+            sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, mreq)
+        sock.setblocking(False)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+# 协议名 -> (端口, 组播地址, 解析函数)
+PROTOCOLS = {
+    "mdns": (MDNS_PORT, MDNS_GROUP, parse_mdns),
+    "netbios": (NETBIOS_NS_PORT, None, parse_netbios),
+    "dhcp": (DHCP_SERVER_PORT, None, parse_dhcp),
+}
+
+
+class PassiveListener:
+    """被动监听任务 - 每个协议一个UDP端点，定期将有变化的观测交给回调（例如写入设备清单）"""
+
+    def __init__(self, store: ObservationStore, protocols: Iterable[str] = tuple(PROTOCOLS),
+                 on_update: Optional[Callable[[List[Dict[str, Any]]], Awaitable[Any]]] = None,
+                 flush_interval: float = 30):
+        self.store = store
+        self.protocols = [p for p in protocols if p in PROTOCOLS]
+        self.on_update = on_update
+        self.flush_interval = flush_interval
+        self._transports = []
+        self._flush_task: Optional[asyncio.Task] = None
+
+    async def start(self) -> List[str]:
+        """打开所有可用协议的监听端点，返回成功启动的协议"""
+        loop = asyncio.get_running_loop()
+        started = []
+        for name in self.protocols:
+            port, group, parser = PROTOCOLS[name]
+            try:
+                sock = _open_udp_socket(port, group)
+                transport, _ = await loop.create_datagram_endpoint(
+                    lambda: _PassiveProtocol(parser, self.store, name), sock=sock)
+            except OSError as e:
+                print(f"被动监听 {name} (UDP {port}) 启动失败: {e}")
+                continue
+            self._transports.append(transport)
+            started.append(name)
+        if started and self.on_update is not None:
+            self._flush_task = loop.create_task(self._flush_loop())
+        return started
+
+    async def _flush_loop(self):
+        """定期将有变化的观测交给回调"""
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            dirty = self.store.pop_dirty()
+            if not dirty:
+                continue
+            try:
+                await self.on_update(dirty)
+            except Exception as e:
+                print(f"保存被动监听结果失败: {e}")
+
+    async def stop(self):
+        """关闭所有监听端点"""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+            try:
+                await self._flush_task
+            except asyncio.CancelledError:
+                pass
+            self._flush_task = None
+        for transport in self._transports:
+            transport.close()
+        self._transports = []
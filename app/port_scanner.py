@@ -0,0 +1,167 @@
+"""
+TCP端口探测模块 - 通过TCP连接探测丢弃ICMP但开放服务端口的主机
+
+对每个主机并发连接端口列表中的端口，任意端口连接成功即认为主机在线，默认在第一个开放端口后
+提前结束该主机的其余探测。连接被拒绝（RST）同样说明主机在线，但不计为开放端口。
+对SSH等服务端先发言的协议读取一行横幅作为服务指纹。
+"""
+
+import asyncio
+import socket
+import time
+from typing import Any, AsyncIterator, Dict, Iterable, List, Optional, Tuple
+
+DEFAULT_PROBE_PORTS = (22, 80, 443, 445, 3389, 5900)
+
+SERVICE_NAMES = {
+    21: "ftp", 22: "ssh", 23: "telnet", 25: "smtp", 53: "dns", 80: "http",
+    135: "msrpc", 139: "netbios-ssn", 443: "https", 445: "smb", 548: "afp",
+    3389: "rdp", 5900: "vnc", 8006: "proxmox", 8080: "http-alt", 8443: "https-alt",
+}
+
+# 连接后服务端会主动发送横幅的端口
+BANNER_PORTS = {21, 22, 23, 25, 110, 143, 5900}
+
+
+def parse_ports(spec: str) -> List[int]:
+    """解析逗号分隔的端口列表，例如 "22,3389,445"；无效项被忽略"""
+    ports = []
+    for item in spec.split(","):
+        item = item.strip()
+        if not item:
+            continue
+        try:
+            port = int(item)
+        except ValueError:
+            print(f"忽略无效的端口: {item}")
+            continue
+        if 0 < port < 65536 and port not in ports:
+            ports.append(port)
+    return ports
+
+
+def service_name(port: int) -> str:
+    """端口对应的常见服务名"""
+    name = SERVICE_NAMES.get(port)
+    if name is None:
+        try:
+            name = socket.getservbyport(port, "tcp")
+        except OSError:
+            name = ""
+    return name
+
+
+class PortScanner:
+    """有界并发的TCP连接探测"""
+
+    def __init__(self, ports: Iterable[int] = DEFAULT_PROBE_PORTS, timeout: float = 0.5,
+                 concurrency: int = 256, rate_limiter=None, early_exit: bool = True,
+                 banner_timeout: float = 0.3, semaphore: Optional[asyncio.Semaphore] = None):
+        self.ports = list(ports)
+        self.timeout = timeout
+        self.concurrency = concurrency
+        # 可选的速率限制器，需提供 async acquire() 方法；每次连接消耗一个令牌
+        self.rate_limiter = rate_limiter
+        self.early_exit = early_exit
+        self.banner_timeout = banner_timeout
+        # 可选的共享信号量，多个扫描共用同一个并发预算；未提供时每次扫描使用 concurrency
+        self.semaphore = semaphore
+
+    async def _read_banner(self, reader: asyncio.StreamReader) -> str:
+        """读取服务端横幅的第一行"""
+        try:
+            data = await asyncio.wait_for(reader.read(256), self.banner_timeout)
+        except (asyncio.TimeoutError, OSError):
+            return ""
+        line = data.split(b"\n", 1)[0].strip()
+        return "".join(c for c in line.decode("ascii", errors="ignore") if c.isprintable())
+
+    async def _connect(self, ip: str, port: int,
+                       semaphore: asyncio.Semaphore) -> Tuple[int, Optional[bool], str]:
+        """
+        连接单个端口
+
+        Returns:
+            Tuple[int, Optional[bool], str]: (端口, True开放/False拒绝/None无响应, 横幅)
+        """
+        async with semaphore:
+            if self.rate_limiter is not None:
+                await self.rate_limiter.acquire()
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_connection(ip, port), self.timeout)
+            except ConnectionRefusedError:
+                return port, False, ""
+            except (OSError, asyncio.TimeoutError):
+                return port, None, ""
+
+        banner = ""
+        try:
+            if port in BANNER_PORTS:
+                banner = await self._read_banner(reader)
+        finally:
+            writer.close()
+        return port, True, banner
+
+    async def probe_host(self, ip: str, semaphore: Optional[asyncio.Semaphore] = None
+                         ) -> Optional[Dict[str, Any]]:
+        """
+        探测单个主机
+
+        Returns:
+            Optional[Dict]: 主机在线时返回 {"open_ports": [...], "services": {端口: 指纹}}，否则返回None
+        """
+        semaphore = semaphore or self.semaphore or asyncio.Semaphore(self.concurrency)
+        tasks = [asyncio.ensure_future(self._connect(ip, port, semaphore)) for port in self.ports]
+        alive = False
+        open_ports = []
+        services = {}
+        try:
+            for future in asyncio.as_completed(tasks):
+                port, state, banner = await future
+                if state is None:
+                    continue
+                alive = True
+                if state:
+                    open_ports.append(port)
+                    services[str(port)] = banner or service_name(port)
+                    if self.early_exit:
+                        break
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+        if not alive:
+            return None
+        open_ports.sort()
+        return {"open_ports": open_ports, "services": services}
+
+    async def iter_alive(self, targets: Iterable[str], deadline: Optional[float] = None
+                         ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+        """
+        探测所有主机并按完成顺序产出 (IP, 端口信息)
+
+        Args:
+            targets: IPv4地址列表
+            deadline: 整体期限（秒），到达后取消未完成的探测
+        """
+        semaphore = self.semaphore or asyncio.Semaphore(self.concurrency)
+        hard_deadline = time.monotonic() + deadline if deadline is not None else None
+        pending = {asyncio.ensure_future(self.probe_host(ip, semaphore)): ip for ip in targets}
+        try:
+            while pending:
+                wait = None if hard_deadline is None else hard_deadline - time.monotonic()
+                if wait is not None and wait <= 0:
+                    break
+                done, _ = await asyncio.wait(pending, timeout=wait, return_when=asyncio.FIRST_COMPLETED)
+                for task in done:
+                    ip = pending.pop(task)
+                    if task.cancelled() or task.exception() is not None:
+                        continue
+                    result = task.result()
+                    if result is not None:
+                        yield ip, result
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
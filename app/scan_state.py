@@ -0,0 +1,139 @@
+"""
+大网段扫描状态模块 - 全局探测速率限制、网段存活位图和可恢复的扫描游标
+"""
+
+import asyncio
+import base64
+import ipaddress
+import json
+import os
+import threading
+import time
+from typing import Dict, Any, Iterator, Optional
+
+
+class ProbeRateLimiter:
+    """令牌桶速率限制器，所有扫描共享同一个每秒探测数上限"""
+
+    def __init__(self, rate: float, burst: Optional[float] = None):
+        self.rate = rate
+        self.burst = burst if burst is not None else max(1.0, rate / 10)
+        self._tokens = self.burst
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self, tokens: float = 1.0):
+        """获取令牌，不足时等待"""
+        if self.rate <= 0:
+            return
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= tokens:
+                    self._tokens -= tokens
+                    return
+                await asyncio.sleep((tokens - self._tokens) / self.rate)
+
+
+class LivenessBitmap:
+    """网段存活位图 - 每个主机地址占1位"""
+
+    __slots__ = ("network", "first_host", "num_hosts", "bits")
+
+    def __init__(self, network: ipaddress.IPv4Network, bits: Optional[bytes] = None):
+        self.network = network
+        self.first_host, self.num_hosts = host_range(network)
+        size = (self.num_hosts + 7) // 8
+        self.bits = bytearray(bits) if bits is not None and len(bits) == size else bytearray(size)
+
+    def offset(self, ip: str) -> int:
+        """IP地址在网段主机范围内的偏移"""
+        return int(ipaddress.IPv4Address(ip)) - self.first_host
+
+    def set(self, ip: str):
+        """标记主机存活"""
+        i = self.offset(ip)
+        if 0 <= i < self.num_hosts:
+            self.bits[i >> 3] |= 1 << (i & 7)
+
+    def count(self) -> int:
+        """存活主机数"""
+        return int.from_bytes(self.bits, 'little').bit_count()
+
+    def iter_alive(self, end: Optional[int] = None) -> Iterator[str]:
+        """按地址顺序产出存活主机，end 为偏移上限"""
+        end = self.num_hosts if end is None else min(end, self.num_hosts)
+        for byte_index, byte in enumerate(self.bits):
+            if not byte:
+                continue
+            base = byte_index << 3
+            for bit in range(8):
+                if byte & (1 << bit) and base + bit < end:
+                    yield str(ipaddress.IPv4Address(self.first_host + base + bit))
+
+    def encode(self) -> str:
+        """编码为base64字符串以便持久化"""
+        return base64.b64encode(bytes(self.bits)).decode('ascii')
+
+
+def host_range(network: ipaddress.IPv4Network) -> tuple:
+    """返回网段的 (第一个主机地址整数, 主机数量)，与 network.hosts() 一致"""
+    if network.prefixlen >= 31:
+        return int(network.network_address), network.num_addresses
+    return int(network.network_address) + 1, network.num_addresses - 2
+
+
+class ScanCursorStore:
+    """
+    扫描游标存储 - 记录每个网段下一个待扫描的主机偏移和已扫描部分的存活位图
+
+    扫描中断后（超时、取消或服务重启），下一次扫描同一网段时从游标处继续。
+    ICMP扫描之后还有TCP端口探测阶段时，"port_next" 记录端口探测的下一个偏移，
+    两个阶段都完成后才删除游标。
+    """
+
+    def __init__(self, path: str = "scan_cursors.json"):
+        self.path = path
+        self._lock = threading.Lock()
+        self._cursors: Dict[str, Dict[str, Any]] = {}
+        try:
+            if os.path.exists(path):
+                with open(path, 'r', encoding='utf-8') as f:
+                    self._cursors = json.load(f)
+        except Exception as e:
+            print(f"加载扫描游标失败: {e}")
+
+    def get(self, network: str) -> Optional[Dict[str, Any]]:
+        """获取网段的游标 {"next": 偏移, "bitmap": base64, "port_next": 偏移（可选）, "updated_at": 时间}"""
+        return self._cursors.get(network)
+
+    def save(self, network: str, next_offset: int, bitmap: LivenessBitmap,
+             port_next: Optional[int] = None):
+        """保存网段游标，port_next 为端口探测阶段的下一个偏移"""
+        cursor = {
+            "next": next_offset,
+            "bitmap": bitmap.encode(),
+            "updated_at": time.time()
+        }
+        if port_next is not None:
+            cursor["port_next"] = port_next
+        self._cursors[network] = cursor
+        self._flush()
+
+    def clear(self, network: str):
+        """网段扫描完成后删除游标"""
+        if self._cursors.pop(network, None) is not None:
+            self._flush()
+
+    def _flush(self):
+        """原子写入游标文件"""
+        with self._lock:
+            try:
+                tmp_path = f"{self.path}.tmp"
+                with open(tmp_path, 'w', encoding='utf-8') as f:
+                    json.dump(self._cursors, f)
+                os.replace(tmp_path, self.path)
+            except Exception as e:
+                print(f"保存扫描游标失败: {e}")
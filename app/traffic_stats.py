@@ -0,0 +1,162 @@
+"""
+网络接口流量采样模块 - 定时读取网卡计数器，以定长环形缓冲区保存速率时间序列
+"""
+
+import asyncio
+import time
+from array import array
+from typing import Dict, Any, List, Optional
+
+import psutil
+
+
+class InterfaceTrafficRing:
+    """单个网卡的定长环形缓冲区（基于array，内存占用固定）"""
+
+    __slots__ = ("capacity", "head", "count", "timestamps",
+                 "rx_bps", "tx_bps", "rx_pps", "tx_pps")
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.head = 0  # 下一个写入位置
+        self.count = 0
+        self.timestamps = array('d', bytes(8 * capacity))
+        self.rx_bps = array('d', bytes(8 * capacity))
+        self.tx_bps = array('d', bytes(8 * capacity))
+        self.rx_pps = array('d', bytes(8 * capacity))
+        self.tx_pps = array('d', bytes(8 * capacity))
+
+    def append(self, ts: float, rx_bps: float, tx_bps: float, rx_pps: float, tx_pps: float):
+        """写入一个采样点，缓冲区满时覆盖最旧的数据"""
+        i = self.head
+        self.timestamps[i] = ts
+        self.rx_bps[i] = rx_bps
+        self.tx_bps[i] = tx_bps
+        self.rx_pps[i] = rx_pps
+        self.tx_pps[i] = tx_pps
+        self.head = (i + 1) % self.capacity
+        if self.count < self.capacity:
+            self.count += 1
+
+    def series(self, points: Optional[int] = None) -> Dict[str, List[float]]:
+        """按时间顺序返回最近的采样点"""
+        n = self.count if points is None else max(0, min(points, self.count))
+        start = (self.head - n) % self.capacity
+        indexes = [(start + k) % self.capacity for k in range(n)]
+        return {
+            "timestamps": [self.timestamps[i] for i in indexes],
+            "rx_bytes_per_sec": [self.rx_bps[i] for i in indexes],
+            "tx_bytes_per_sec": [self.tx_bps[i] for i in indexes],
+            "rx_packets_per_sec": [self.rx_pps[i] for i in indexes],
+            "tx_packets_per_sec": [self.tx_pps[i] for i in indexes],
+        }
+
+    def latest(self) -> Optional[Dict[str, float]]:
+        """返回最新的采样点"""
+        if not self.count:
+            return None
+        i = (self.head - 1) % self.capacity
+        return {
+            "timestamp": self.timestamps[i],
+            "rx_bytes_per_sec": self.rx_bps[i],
+            "tx_bytes_per_sec": self.tx_bps[i],
+            "rx_packets_per_sec": self.rx_pps[i],
+            "tx_packets_per_sec": self.tx_pps[i],
+        }
+
+
+class InterfaceTrafficSampler:
+    """
+    网卡流量后台采样器
+
+    以固定间隔读取 psutil.net_io_counters(pernic=True)，将相邻两次读数的差值
+    换算为速率写入每个网卡的环形缓冲区。缓冲区容量和网卡数量均有上限，
+    因此内存占用与运行时长无关。
+    """
+
+    def __init__(self, interval: float = 1.0, capacity: int = 300, max_interfaces: int = 64):
+        self.interval = interval
+        self.capacity = capacity
+        self.max_interfaces = max_interfaces
+        self.rings: Dict[str, InterfaceTrafficRing] = {}
+        # 上一次读数 {网卡: (单调时间, bytes_recv, bytes_sent, packets_recv, packets_sent)}
+        self._last: Dict[str, tuple] = {}
+        self._task: Optional[asyncio.Task] = None
+
+    def sample(self):
+        """执行一次采样"""
+        now_mono = time.monotonic()
+        now_wall = time.time()
+        counters = psutil.net_io_counters(pernic=True)
+
+        for name, c in counters.items():
+            previous = self._last.get(name)
+            current = (now_mono, c.bytes_recv, c.bytes_sent, c.packets_recv, c.packets_sent)
+
+            if previous is None:
+                if len(self._last) >= self.max_interfaces:
+                    continue
+                self._last[name] = current
+                continue
+
+            self._last[name] = current
+            elapsed = now_mono - previous[0]
+            if elapsed <= 0:
+                continue
+
+            # 计数器回绕或网卡重置时差值为负，按0处理
+            rates = [max(0, current[k] - previous[k]) / elapsed for k in range(1, 5)]
+
+            ring = self.rings.get(name)
+            if ring is None:
+                ring = self.rings[name] = InterfaceTrafficRing(self.capacity)
+            ring.append(now_wall, rates[0], rates[1], rates[2], rates[3])
+
+        # 清理已消失的网卡
+        for name in [n for n in self._last if n not in counters]:
+            del self._last[name]
+            self.rings.pop(name, None)
+
+    async def run(self):
+        """后台采样循环"""
+        while True:
+            try:
+                self.sample()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"网卡流量采样失败: {e}")
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        """在当前事件循环中启动后台采样任务"""
+        if self._task is None or self._task.done():
+            self._task = asyncio.get_running_loop().create_task(self.run())
+
+    async def stop(self):
+        """停止后台采样任务"""
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    def get_stats(self, interface: Optional[str] = None, points: Optional[int] = None) -> Dict[str, Any]:
+        """获取网卡速率时间序列"""
+        names = [interface] if interface else sorted(self.rings)
+        result = {}
+        for name in names:
+            ring = self.rings.get(name)
+            if ring is None:
+                continue
+            result[name] = {
+                "latest": ring.latest(),
+                "series": ring.series(points),
+            }
+        return {
+            "interval": self.interval,
+            "capacity": self.capacity,
+            "interfaces": result,
+        }
@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+验证码渲染基准测试
+比较原渲染方式（每次加载字体、逐点绘制噪点、默认PNG压缩）与当前 create_captcha_image 的每秒生成数
+
+用法:
+    python benchmarks/captcha_benchmark.py
+    python benchmarks/captcha_benchmark.py --seconds 5
+"""
+
+import argparse
+import base64
+import os
+import random
+import sys
+import time
+from io import BytesIO
+
+from PIL import Image, ImageDraw, ImageFont
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import auth  # noqa: E402
+
+
+def legacy_create_captcha_image(text: str, width: int = 120, height: int = 40) -> str:
+    """原渲染方式，作为对比基线"""
+    image = Image.new('RGB', (width, height), color='white')
+    draw = ImageDraw.Draw(image)
+
+    font = None
+    for font_path in auth.CAPTCHA_FONT_PATHS:
+        try:
+            font = ImageFont.truetype(font_path, 20)
+            break
+        except OSError:
+            continue
+    if font is None:
+        font = ImageFont.load_default()
+
+    for _ in range(100):
+        x = random.randint(0, width)
+        y = random.randint(0, height)
+        draw.point((x, y), fill=(random.randint(200, 255), random.randint(200, 255), random.randint(200, 255)))
+
+    text_width = draw.textlength(text, font=font)
+    x = (width - text_width) // 2
+    y = (height - 20) // 2
+    char_width = text_width // len(text)
+    for i, char in enumerate(text):
+        color = (random.randint(0, 100), random.randint(0, 100), random.randint(0, 100))
+        draw.text((x + i * char_width + random.randint(-3, 3), y + random.randint(-3, 3)), char, fill=color, font=font)
+
+    for _ in range(3):
+        start = (random.randint(0, width), random.randint(0, height))
+        end = (random.randint(0, width), random.randint(0, height))
+        draw.line([start, end], fill=(random.randint(100, 200), random.randint(100, 200), random.randint(100, 200)), width=1)
+
+    buffer = BytesIO()
+    image.save(buffer, format='PNG')
+    return f"data:image/png;base64,{base64.b64encode(buffer.getvalue()).decode()}"
+
+
+def measure(render, seconds: float) -> tuple:
+    """在给定时间内反复渲染，返回 (每秒生成数, 平均data URL长度)"""
+    count = 0
+    total_size = 0
+    deadline = time.perf_counter() + seconds
+    start = time.perf_counter()
+    while time.perf_counter() < deadline:
+        total_size += len(render(auth.generate_captcha_text()))
+        count += 1
+    return count / (time.perf_counter() - start), total_size / count
+
+
+def main():
+    parser = argparse.ArgumentParser(description="验证码渲染基准测试")
+    parser.add_argument("--seconds", type=float, default=3.0, help="每种方式的测量时间，秒 (默认: 3)")
+    args = parser.parse_args()
+
+    before, before_size = measure(legacy_create_captcha_image, args.seconds)
+    after, after_size = measure(auth.create_captcha_image, args.seconds)
+
+    print(f"{'方式':<8} {'每秒生成数':>10} {'平均大小(字节)':>14}")
+    print(f"{'优化前':<8} {before:>13.0f} {before_size:>18.0f}")
+    print(f"{'优化后':<8} {after:>13.0f} {after_size:>18.0f}")
+    print(f"加速比: {after / before:.2f}x")
+
+
+if __name__ == "__main__":
+    main()
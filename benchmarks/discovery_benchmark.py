@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+设备发现基准测试
+使用模拟网络后端对 /24 到 /16 网段执行完整的发现流水线，报告墙钟时间、CPU时间和内存峰值
+
+用法:
+    python benchmarks/discovery_benchmark.py
+    python benchmarks/discovery_benchmark.py --prefixes 24,20 --density 0.3 --loss 0.05
+"""
+
+import argparse
+import asyncio
+import ipaddress
+import os
+import sys
+import tempfile
+import time
+import tracemalloc
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 导入服务模块前设置环境：临时数据文件、关闭反向DNS、不限制探测速率
+_workdir = tempfile.mkdtemp(prefix="wol-bench-")
+os.environ.setdefault('WOL_INVENTORY_DB', os.path.join(_workdir, 'inventory.db'))
+os.environ.setdefault('WOL_SCAN_CURSOR_FILE', os.path.join(_workdir, 'scan_cursors.json'))
+os.environ.setdefault('WOL_RDNS', '0')
+os.environ.setdefault('WOL_SCAN_RATE', '0')
+
+import standalone_app_v2 as service  # noqa: E402
+from app.network_backend import SimulatedBackend  # noqa: E402
+
+
+async def run_discovery(network: str) -> int:
+    """执行一次完整发现，返回发现的设备数"""
+    devices = await service.discover_network_devices([ipaddress.IPv4Network(network)])
+    return len(devices)
+
+
+async def measure(args, prefix: int) -> dict:
+    """对一个网段大小测量一次（计时和内存分两次运行，避免tracemalloc影响计时）"""
+    network = f"10.0.0.0/{prefix}"
+
+    def make_backend():
+        return SimulatedBackend(
+            [network], density=args.density, latency=(args.latency_min, args.latency_max),
+            loss=args.loss, seed=args.seed, arp=args.arp, timeout=args.timeout
+        )
+
+    service.network_backend = make_backend()
+    live = len(service.network_backend.hosts)
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    found = await run_discovery(network)
+    wall = time.perf_counter() - wall_start
+    cpu = time.process_time() - cpu_start
+
+    peak = None
+    if not args.no_memory:
+        service.network_backend = make_backend()
+        tracemalloc.start()
+        await run_discovery(network)
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+    return {"prefix": prefix, "hosts": ipaddress.IPv4Network(network).num_addresses - 2,
+            "live": live, "found": found, "wall": wall, "cpu": cpu, "peak": peak}
+
+
+async def run_all(args):
+    """依次测量所有网段大小"""
+    print(f"{'网段':>6} {'地址数':>7} {'在线':>6} {'发现':>6} {'墙钟(s)':>9} {'CPU(s)':>8} {'内存峰值(MB)':>12}")
+    for prefix in (int(p) for p in args.prefixes.split(",")):
+        result = await measure(args, prefix)
+        peak = "-" if result["peak"] is None else f"{result['peak'] / 1024 / 1024:.1f}"
+        print(f"{'/' + str(result['prefix']):>6} {result['hosts']:>9} {result['live']:>8} {result['found']:>8} "
+              f"{result['wall']:>9.3f} {result['cpu']:>8.3f} {peak:>12}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="设备发现基准测试（模拟网络后端）")
+    parser.add_argument("--prefixes", default="24,22,20,18,16", help="网段前缀长度列表 (默认: 24,22,20,18,16)")
+    parser.add_argument("--density", type=float, default=0.2, help="在线主机比例 (默认: 0.2)")
+    parser.add_argument("--latency-min", type=float, default=0.001, help="最小应答延迟，秒 (默认: 0.001)")
+    parser.add_argument("--latency-max", type=float, default=0.02, help="最大应答延迟，秒 (默认: 0.02)")
+    parser.add_argument("--loss", type=float, default=0.0, help="丢包率 (默认: 0)")
+    parser.add_argument("--timeout", type=float, default=0.05, help="每块探测的等待时间，秒 (默认: 0.05)")
+    parser.add_argument("--seed", type=int, default=0, help="随机种子 (默认: 0)")
+    parser.add_argument("--arp", action="store_true", help="模拟ARP扫描（探测直接返回MAC）")
+    parser.add_argument("--no-memory", action="store_true", help="不测量内存峰值")
+    args = parser.parse_args()
+    asyncio.run(run_all(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+#!/usr/bin/env python3
+"""
+令牌验证基准测试
+比较每次请求完整解码JWT（HMAC校验 + JSON解码）与 verify_token 命中令牌缓存时的单次耗时
+
+用法:
+    python benchmarks/token_benchmark.py
+    python benchmarks/token_benchmark.py --iterations 50000
+"""
+
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from app import auth  # noqa: E402
+
+
+def per_call(func, iterations: int) -> float:
+    """单次调用的平均耗时，单位微秒"""
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description="令牌验证基准测试")
+    parser.add_argument("--iterations", type=int, default=20000, help="每项测量的调用次数 (默认: 20000)")
+    args = parser.parse_args()
+
+    token = auth.create_access_token(data={"sub": "admin"})
+
+    def full_decode():
+        payload = auth.jwt.decode(token, auth.SECRET_KEY, algorithms=[auth.ALGORITHM])
+        return {"username": payload.get("sub")}
+
+    def cached_verify():
+        return auth.verify_token(token)
+
+    assert cached_verify() == full_decode()
+    decode_us = per_call(full_decode, args.iterations)
+    cached_us = per_call(cached_verify, args.iterations)
+
+    auth.revoke_token(token)
+    revoked = auth.verify_token(token) is None
+
+    print(f"{'方式':<12} {'单次(µs)':>10}")
+    print(f"{'完整解码':<12} {decode_us:>10.2f}")
+    print(f"{'缓存命中':<12} {cached_us:>10.2f}")
+    print(f"加速比: {decode_us / cached_us:.1f}x，缓存统计: {auth.get_token_cache_stats()}")
+    print(f"登出吊销后令牌失效: {'是' if revoked else '否'}")
+
+
+if __name__ == "__main__":
+    main()
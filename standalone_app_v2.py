@@ -18,8 +18,9 @@ import ipaddress
 import subprocess
 import platform
 import re
+import asyncio
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, List, Set, Tuple, AsyncIterator, Awaitable, Callable
 from io import BytesIO
 
 # 设置环境变量
@@ -30,13 +31,31 @@ os.environ.setdefault('WOL_SESSION_SECRET', 'standalone-secret-key')
 try:
     from fastapi import FastAPI, HTTPException, Depends, Request, Form
     from fastapi.middleware.cors import CORSMiddleware
-    from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse
+    from fastapi.responses import HTMLResponse, JSONResponse, RedirectResponse, StreamingResponse
     from fastapi.security import HTTPBearer
     import uvicorn
     import psutil
     import socket
     import struct
     import ipaddress
+    from app.traffic_stats import InterfaceTrafficSampler
+    from app.icmp_scanner import IcmpScanner, icmp_available
+    from app.neighbors import (
+        proc_arp_available, netlink_available, read_neighbor_table,
+        dump_neighbors, lookup_neighbor_mac
+    )
+    from app.inventory import DeviceInventory
+    from app.discovery_scheduler import DiscoveryScheduler, parse_schedule
+    from app.arp_scanner import ArpScanner, arp_scan_supported
+    from app.scan_state import ProbeRateLimiter, LivenessBitmap, ScanCursorStore, host_range
+    from app.oui import load_oui_index, DEFAULT_OUI_PATH
+    from app.hostname_resolver import HostnameResolver
+    from app.discovery_cache import DiscoveryCache
+    from app.port_scanner import PortScanner, parse_ports, DEFAULT_PROBE_PORTS
+    from app.arp_sniffer import ArpSniffer, PresenceTracker
+    from app.network_backend import NetworkBackend, SimulatedBackend
+    from app.ip_matcher import CidrMatcher, DecisionCache
+    from app.passive_listener import PassiveListener, ObservationStore, PROTOCOLS as PASSIVE_PROTOCOLS
     print("✅ 所有依赖导入成功")
 except ImportError as e:
     print(f"❌ 依赖导入失败: {e}")
@@ -53,9 +72,96 @@ sessions = {}
 # IP白名单存储
 ip_whitelist = {'127.0.0.1', '::1'}  # 默认包含本地回环地址
 
+# 按客户端IP缓存的白名单判定结果，白名单变化时递增代数失效
+whitelist_decisions = DecisionCache(int(os.getenv('WOL_WHITELIST_CACHE_SIZE', '4096')))
+
+# 编译后的白名单匹配器，白名单变化时整体替换
+whitelist_matcher = CidrMatcher(ip_whitelist)
+
 # 验证码存储 {session_id: {'code': 'ABCD', 'expires': datetime, 'attempts': 0}}
 captcha_store = {}
 
+# Ping扫描配置：并发上限和单个网段的整体期限（秒）
+PING_CONCURRENCY = int(os.getenv('WOL_PING_CONCURRENCY', '256'))
+PING_SCAN_DEADLINE = float(os.getenv('WOL_PING_DEADLINE', '10'))
+
+# 大网段扫描配置：单个网段主机数上限、分块大小和全局每秒探测数上限
+MAX_SCAN_HOSTS = int(os.getenv('WOL_SCAN_MAX_HOSTS', '65536'))
+SCAN_CHUNK_SIZE = int(os.getenv('WOL_SCAN_CHUNK', '1024'))
+probe_rate_limiter = ProbeRateLimiter(float(os.getenv('WOL_SCAN_RATE', '1000')))
+
+# TCP端口探测（WOL_PORT_PROBE=1 开启）：对未响应ARP/ICMP的主机连接常见服务端口
+PORT_PROBE_ENABLED = os.getenv('WOL_PORT_PROBE', '0') != '0'
+PORT_PROBE_PORTS = parse_ports(os.getenv('WOL_PORT_PROBE_PORTS', ','.join(map(str, DEFAULT_PROBE_PORTS))))
+PORT_PROBE_TIMEOUT = float(os.getenv('WOL_PORT_PROBE_TIMEOUT', '0.5'))
+PORT_PROBE_EARLY_EXIT = os.getenv('WOL_PORT_PROBE_EARLY_EXIT', '1') != '0'
+
+# 扫描游标（可恢复扫描）和每个网段的存活位图
+scan_cursors = ScanCursorStore(os.getenv('WOL_SCAN_CURSOR_FILE', 'scan_cursors.json'))
+subnet_liveness: Dict[str, LivenessBitmap] = {}
+subnet_scan_locks: Dict[str, asyncio.Lock] = {}
+
+# ping进程创建锁
+ping_spawn_lock = asyncio.Lock()
+
+# 所有并发扫描共享的探测并发预算（ping进程数、TCP连接数）
+probe_budget = asyncio.Semaphore(PING_CONCURRENCY)
+
+# 并发扫描的网段数上限
+DISCOVERY_WORKERS = int(os.getenv('WOL_DISCOVERY_WORKERS', '8'))
+
+# 是否使用进程内ICMP扫描（首次扫描时检测）
+_icmp_scan_enabled = None
+
+# 是否对直连网段使用ARP扫描（没有CAP_NET_RAW权限时自动关闭）
+_arp_scan_enabled = os.getenv('WOL_ARP_SCAN', '1') != '0'
+
+# 设备清单数据库（SQLite WAL），打开失败时不影响其他功能
+try:
+    device_inventory = DeviceInventory(os.getenv('WOL_INVENTORY_DB', 'wol_inventory.db'))
+except Exception as e:
+    print(f"打开设备清单数据库失败: {e}")
+    device_inventory = None
+
+# OUI厂商索引（内存映射），索引文件不存在时不显示厂商
+oui_index = load_oui_index(os.getenv('WOL_OUI_DB', DEFAULT_OUI_PATH))
+
+# 反向DNS解析（WOL_RDNS=0 关闭）：并发上限、单次查询超时和正/负结果缓存时间（秒）
+hostname_resolver = HostnameResolver(
+    concurrency=int(os.getenv('WOL_RDNS_CONCURRENCY', '32')),
+    timeout=float(os.getenv('WOL_RDNS_TIMEOUT', '1')),
+    positive_ttl=float(os.getenv('WOL_RDNS_TTL', '3600')),
+    negative_ttl=float(os.getenv('WOL_RDNS_NEGATIVE_TTL', '300'))
+) if os.getenv('WOL_RDNS', '1') != '0' else None
+
+# 发现结果缓存：超过软TTL（秒）后由单个后台任务刷新，期间返回旧结果；流式发现订阅同一个刷新
+discovery_cache = DiscoveryCache(lambda publish: discover_network_devices(on_event=publish),
+                                 soft_ttl=float(os.getenv('WOL_DISCOVERY_CACHE_TTL', '60')))
+
+# 被动监听（WOL_PASSIVE_LISTEN=1 开启）：从 mDNS/NetBIOS/DHCP 报文收集主机名、MAC和IP，在启动时创建
+PASSIVE_LISTEN_ENABLED = os.getenv('WOL_PASSIVE_LISTEN', '0') != '0'
+passive_observations = ObservationStore()
+passive_listener: Optional[PassiveListener] = None
+
+# ARP监听（WOL_ARP_SNIFF=1 开启）：记录每个MAC最后出现的时间，窗口（秒）内出现过即视为在线
+ARP_SNIFF_ENABLED = os.getenv('WOL_ARP_SNIFF', '0') != '0'
+ONLINE_WINDOW = float(os.getenv('WOL_ONLINE_WINDOW', '300'))
+arp_presence = PresenceTracker()
+arp_sniffer: Optional[ArpSniffer] = None
+
+# 单次设备发现的整体期限（秒），到达后取消并返回已发现的设备
+DISCOVERY_DEADLINE = float(os.getenv('WOL_DISCOVERY_DEADLINE', '120'))
+
+# 后台发现调度：本机网段的默认间隔（秒，0表示不自动扫描），在启动时创建
+DISCOVERY_INTERVAL = float(os.getenv('WOL_DISCOVERY_INTERVAL', '0'))
+discovery_scheduler: Optional[DiscoveryScheduler] = None
+
+# 网卡流量采样器（定长环形缓冲区，内存占用固定）
+traffic_sampler = InterfaceTrafficSampler(
+    interval=float(os.getenv('WOL_TRAFFIC_INTERVAL', '1')),
+    capacity=int(os.getenv('WOL_TRAFFIC_POINTS', '300'))
+)
+
 # Wake-on-LAN功能 - 增强版本
 def send_magic_packet(mac_address: str, broadcast_ip: str = '255.255.255.255', port: int = 9, interface: str = None):
     """发送魔术包唤醒设备 - 增强版本"""
@@ -196,8 +302,19 @@ def calculate_broadcast_address(ip: str, netmask: str) -> str:
     except:
         return "255.255.255.255"
 
-def get_arp_table() -> List[Dict[str, str]]:
-    """获取ARP表中的设备信息"""
+def get_arp_table() -> List[Dict[str, Any]]:
+    """获取ARP表中的设备信息（通过当前网络后端）"""
+    return network_backend.read_neighbors()
+
+def read_system_arp_table() -> List[Dict[str, Any]]:
+    """读取系统ARP表 - Linux读取netlink邻居表或/proc/net/arp，其他系统调用arp命令"""
+    if netlink_available() or proc_arp_available():
+        try:
+            return read_neighbor_table()
+        except Exception as e:
+            print(f"读取邻居表失败: {e}")
+            return []
+
     devices = []
 
     try:
@@ -213,7 +330,7 @@ def get_arp_table() -> List[Dict[str, str]]:
                         mac = mac.replace('-', ':').upper()
                         devices.append({"ip": ip, "mac": mac, "hostname": ""})
         else:
-            # Linux/Unix ARP命令
+            # macOS/BSD ARP命令
             result = subprocess.run(['arp', '-a'], capture_output=True, text=True, timeout=10)
             if result.returncode == 0:
                 for line in result.stdout.split('\n'):
@@ -228,105 +345,695 @@ def get_arp_table() -> List[Dict[str, str]]:
 
     return devices
 
-def ping_scan_network(network: str) -> List[Dict[str, str]]:
+def build_ping_command(ip: str, timeout: float = 1.0) -> List[str]:
+    """构造单次ping命令"""
+    if platform.system().lower() == 'windows':
+        return ['ping', '-n', '1', '-w', str(int(timeout * 1000)), ip]
+    return ['ping', '-c', '1', '-W', str(max(1, int(timeout))), ip]
+
+async def ping_host(ip: str, semaphore: asyncio.Semaphore, timeout: float = 1.0,
+                    rate_limiter: Optional[ProbeRateLimiter] = None) -> bool:
+    """异步ping单个主机，超过单主机期限或被取消时终止ping进程"""
+    async with semaphore, probe_budget:
+        if rate_limiter is not None:
+            await rate_limiter.acquire()
+        try:
+            # 创建进程（fork）会阻塞事件循环，逐个创建使每轮循环最多只fork一次
+            async with ping_spawn_lock:
+                proc = await asyncio.create_subprocess_exec(
+                    *build_ping_command(ip, timeout),
+                    stdout=asyncio.subprocess.DEVNULL,
+                    stderr=asyncio.subprocess.DEVNULL
+                )
+        except Exception:
+            return False
+
+        try:
+            return await asyncio.wait_for(proc.wait(), timeout + 1.0) == 0
+        except asyncio.TimeoutError:
+            return False
+        finally:
+            if proc.returncode is None:
+                try:
+                    proc.kill()
+                except ProcessLookupError:
+                    pass
+                await proc.wait()
+
+async def iter_ping_subprocess(hosts: List[str], concurrency: int = PING_CONCURRENCY,
+                               timeout: float = 1.0, deadline: float = PING_SCAN_DEADLINE,
+                               rate_limiter: Optional[ProbeRateLimiter] = None) -> AsyncIterator[str]:
+    """通过并发ping进程探测主机，按完成顺序产出有回复的地址（ICMP套接字不可用时的备用方案）"""
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = {asyncio.create_task(ping_host(ip, semaphore, timeout, rate_limiter)): ip for ip in hosts}
+    if not tasks:
+        return
+
+    loop = asyncio.get_running_loop()
+    end_time = loop.time() + deadline
+    pending = set(tasks)
+    try:
+        while pending:
+            remaining = end_time - loop.time()
+            if remaining <= 0:
+                break
+            done, pending = await asyncio.wait(pending, timeout=remaining,
+                                               return_when=asyncio.FIRST_COMPLETED)
+            for task in done:
+                if not task.cancelled() and task.exception() is None and task.result():
+                    yield tasks[task]
+    finally:
+        # 整体期限到达或调用方取消时，终止所有未完成的探测
+        for task in tasks:
+            if not task.done():
+                task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+
+    if pending:
+        print(f"Ping扫描超过期限 {deadline}s，{len(pending)} 个主机未完成")
+
+def icmp_scan_enabled() -> bool:
+    """检查是否使用进程内ICMP扫描（结果缓存）"""
+    global _icmp_scan_enabled
+    if _icmp_scan_enabled is None:
+        _icmp_scan_enabled = os.getenv('WOL_ICMP_SCAN', '1') != '0' and icmp_available()
+        if not _icmp_scan_enabled:
+            print("ICMP套接字不可用，Ping扫描使用ping命令")
+    return _icmp_scan_enabled
+
+async def iter_probe_chunk(hosts: List[str], concurrency: int, timeout: float, deadline: float,
+                           arp_source: Optional[Tuple[str, str]] = None) -> AsyncIterator[Tuple[str, str]]:
+    """
+    探测一批主机，产出 (IP, MAC)
+
+    本地网段（提供了 arp_source=(接口, 源IP)）优先使用ARP扫描，直接得到MAC；
+    否则优先使用ICMP套接字，再退回有界并发的ping进程，此时MAC为空。
+    """
+    global _icmp_scan_enabled, _arp_scan_enabled
+
+    if arp_source and _arp_scan_enabled:
+        interface, source_ip = arp_source
+        try:
+            scanner = ArpScanner(interface, source_ip, timeout, probe_rate_limiter)
+            async for ip, mac in scanner.iter_replies(hosts, deadline=deadline):
+                yield ip, mac
+            return
+        except PermissionError as e:
+            print(f"ARP扫描需要CAP_NET_RAW权限，改用ICMP扫描: {e}")
+            _arp_scan_enabled = False
+        except OSError as e:
+            print(f"接口 {interface} ARP扫描失败，改用ICMP扫描: {e}")
+
+    if icmp_scan_enabled():
+        try:
+            async for ip in IcmpScanner(timeout, probe_rate_limiter).iter_alive(hosts, deadline=deadline):
+                yield ip, ""
+            return
+        except OSError as e:
+            print(f"ICMP扫描失败，改用ping命令: {e}")
+            _icmp_scan_enabled = False
+
+    async for ip in iter_ping_subprocess(hosts, concurrency, timeout, deadline, probe_rate_limiter):
+        yield ip, ""
+
+class SystemNetworkBackend(NetworkBackend):
+    """系统网络后端 - 读取系统邻居表，依次使用ARP扫描、ICMP套接字或ping进程探测"""
+
+    name = "system"
+
+    def read_neighbors(self) -> List[Dict[str, Any]]:
+        return read_system_arp_table()
+
+    def iter_probe(self, hosts: List[str], concurrency: int, timeout: float, deadline: float,
+                   arp_source: Optional[Tuple[str, str]] = None) -> AsyncIterator[Tuple[str, str]]:
+        return iter_probe_chunk(hosts, concurrency, timeout, deadline, arp_source)
+
+def create_network_backend() -> NetworkBackend:
+    """根据 WOL_NETWORK_BACKEND 创建网络后端"""
+    if os.getenv('WOL_NETWORK_BACKEND', 'system') == 'simulated':
+        low, _, high = os.getenv('WOL_SIM_LATENCY', '0.001,0.02').partition(',')
+        backend = SimulatedBackend(
+            [n for n in os.getenv('WOL_SIM_NETWORKS', '10.99.0.0/24').split(',') if n.strip()],
+            density=float(os.getenv('WOL_SIM_DENSITY', '0.2')),
+            latency=(float(low), float(high or low)),
+            loss=float(os.getenv('WOL_SIM_LOSS', '0')),
+            seed=int(os.getenv('WOL_SIM_SEED', '0'))
+        )
+        print(f"使用模拟网络后端: {len(backend.hosts)} 个模拟主机")
+        return backend
+    return SystemNetworkBackend()
+
+network_backend = create_network_backend()
+
+async def iter_scan_network(network: str, concurrency: int = PING_CONCURRENCY,
+                            timeout: float = 1.0, deadline: float = PING_SCAN_DEADLINE,
+                            arp_source: Optional[Tuple[str, str]] = None,
+                            port_phase: bool = False) -> AsyncIterator[Tuple[str, str]]:
+    """
+    扫描网络段，按回复顺序产出活跃的 (IP, MAC)
+
+    网段按 SCAN_CHUNK_SIZE 分块扫描，deadline 为单块期限；所有扫描共享全局探测速率上限。
+    每完成一块保存游标和存活位图，扫描中断后下次从游标处继续，并先产出已扫描部分的存活主机。
+    port_phase 为True时之后还有 iter_port_probe_network 的未知主机探测阶段，
+    扫描完成后保留游标（记录端口探测偏移），由端口探测阶段完成后删除。
+    """
+    net = ipaddress.IPv4Network(network, strict=False)
+    key = str(net)
+    first_host, num_hosts = host_range(net)
+    if num_hosts > MAX_SCAN_HOSTS:
+        print(f"网段 {key} 包含 {num_hosts} 个地址，超过上限 {MAX_SCAN_HOSTS}，跳过扫描")
+        return
+
+    lock = subnet_scan_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        cursor = scan_cursors.get(key)
+        if cursor:
+            bitmap = LivenessBitmap(net, base64.b64decode(cursor["bitmap"]))
+            start = cursor["next"]
+            print(f"网段 {key} 从偏移 {start}/{num_hosts} 继续扫描")
+            for ip in bitmap.iter_alive(start):
+                yield ip, ""
+        else:
+            bitmap = LivenessBitmap(net)
+            start = 0
+        subnet_liveness[key] = bitmap
+
+        for chunk_start in range(start, num_hosts, SCAN_CHUNK_SIZE):
+            chunk_end = min(chunk_start + SCAN_CHUNK_SIZE, num_hosts)
+            hosts = [str(ipaddress.IPv4Address(first_host + i)) for i in range(chunk_start, chunk_end)]
+            async for ip, mac in network_backend.iter_probe(hosts, concurrency, timeout, deadline, arp_source):
+                bitmap.set(ip)
+                yield ip, mac
+            if chunk_end < num_hosts:
+                scan_cursors.save(key, chunk_end, bitmap, cursor.get("port_next") if cursor else None)
+
+        if port_phase:
+            scan_cursors.save(key, num_hosts, bitmap, cursor.get("port_next", 0) if cursor else 0)
+        else:
+            scan_cursors.clear(key)
+
+async def iter_port_probe_network(network: ipaddress.IPv4Network, known: Set[str],
+                                  probe_unknown: bool = True) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    对网段进行TCP端口探测，产出 (IP, {"open_ports": [...], "services": {...}})
+
+    已发现的主机（known 中属于该网段的地址）探测全部端口，只产出有开放端口的主机；
+    probe_unknown 为True时再探测其余地址，发现丢弃ICMP但开放服务端口的主机。
+    ARP扫描过的直连网段中未应答ARP的主机无法建立TCP连接，此时应传入 probe_unknown=False。
+    与ping扫描相同按 SCAN_CHUNK_SIZE 分块，每块期限为 PING_SCAN_DEADLINE，共享全局探测速率上限。
+    未知主机探测每完成一块将偏移保存到扫描游标的 "port_next"，中断后下次从该偏移继续，
+    全部完成后删除游标（此前 iter_scan_network 需以 port_phase=True 扫描该网段）。
+    """
+    first_host, num_hosts = host_range(network)
+    if num_hosts > MAX_SCAN_HOSTS or not PORT_PROBE_PORTS:
+        return
+
+    found = sorted((ipaddress.IPv4Address(ip) for ip in known
+                    if ipaddress.ip_address(ip).version == 4 and ipaddress.IPv4Address(ip) in network))
+    scanner = PortScanner(PORT_PROBE_PORTS, PORT_PROBE_TIMEOUT, PING_CONCURRENCY,
+                          probe_rate_limiter, early_exit=False, semaphore=probe_budget)
+    for chunk_start in range(0, len(found), SCAN_CHUNK_SIZE):
+        hosts = [str(ip) for ip in found[chunk_start:chunk_start + SCAN_CHUNK_SIZE]]
+        async for ip, ports in scanner.iter_alive(hosts, deadline=PING_SCAN_DEADLINE):
+            if ports["open_ports"]:
+                yield ip, ports
+
+    if not probe_unknown:
+        return
+    scanner = PortScanner(PORT_PROBE_PORTS, PORT_PROBE_TIMEOUT, PING_CONCURRENCY,
+                          probe_rate_limiter, PORT_PROBE_EARLY_EXIT, semaphore=probe_budget)
+    key = str(network)
+    lock = subnet_scan_locks.setdefault(key, asyncio.Lock())
+    async with lock:
+        cursor = scan_cursors.get(key)
+        bitmap = subnet_liveness.get(key)
+        if cursor is None or bitmap is None:
+            return
+        start = cursor.get("port_next", 0)
+        if start:
+            print(f"网段 {key} 从偏移 {start}/{num_hosts} 继续端口探测")
+        for chunk_start in range(start, num_hosts, SCAN_CHUNK_SIZE):
+            chunk_end = min(chunk_start + SCAN_CHUNK_SIZE, num_hosts)
+            hosts = [ip for ip in (str(ipaddress.IPv4Address(first_host + i)) for i in range(chunk_start, chunk_end))
+                     if ip not in known]
+            if hosts:
+                async for ip, ports in scanner.iter_alive(hosts, deadline=PING_SCAN_DEADLINE):
+                    bitmap.set(ip)
+                    yield ip, ports
+            if chunk_end < num_hosts:
+                scan_cursors.save(key, num_hosts, bitmap, chunk_end)
+
+        scan_cursors.clear(key)
+
+async def ping_scan_network(network: str, concurrency: int = PING_CONCURRENCY,
+                            timeout: float = 1.0, deadline: float = PING_SCAN_DEADLINE) -> List[Dict[str, str]]:
     """Ping扫描网络段发现活跃设备"""
     devices = []
 
     try:
-        net = ipaddress.IPv4Network(network, strict=False)
-        # 限制扫描范围，避免扫描过大的网段
-        if net.num_addresses > 254:
-            return devices
-
-        for ip in net.hosts():
-            ip_str = str(ip)
-            try:
-                # 使用ping命令检测设备
-                if platform.system().lower() == 'windows':
-                    result = subprocess.run(['ping', '-n', '1', '-w', '1000', ip_str],
-                                          capture_output=True, timeout=2)
-                else:
-                    result = subprocess.run(['ping', '-c', '1', '-W', '1', ip_str],
-                                          capture_output=True, timeout=2)
-
-                if result.returncode == 0:
-                    devices.append({"ip": ip_str, "mac": "", "hostname": ""})
-
-            except subprocess.TimeoutExpired:
-                continue
-            except Exception:
-                continue
-
+        alive = [ip async for ip, _ in iter_scan_network(network, concurrency, timeout, deadline)]
+        alive.sort(key=lambda ip: ipaddress.IPv4Address(ip))
+        devices = [{"ip": ip, "mac": "", "hostname": ""} for ip in alive]
+    except asyncio.CancelledError:
+        raise
     except Exception as e:
         print(f"网络扫描失败: {e}")
 
     return devices
 
-def discover_network_devices() -> List[Dict[str, str]]:
-    """发现网络设备 - 结合ARP表和ping扫描"""
-    print("开始发现网络设备...")
-
-    # 1. 从ARP表获取已知设备
-    arp_devices = get_arp_table()
-    print(f"从ARP表发现 {len(arp_devices)} 个设备")
-
-    # 2. 获取本机网络接口，进行ping扫描
-    interfaces = get_network_interfaces()
-    ping_devices = []
-
-    for interface in interfaces:
+def find_arp_source(network: ipaddress.IPv4Network) -> Optional[Tuple[str, str]]:
+    """查找直连该网段的本机接口，返回 (接口名, 本机IP)，用于ARP扫描"""
+    if not arp_scan_supported():
+        return None
+    for interface in get_network_interfaces():
+        for addr in interface["addresses"]:
+            if addr["family"] == "AF_INET" and ipaddress.IPv4Address(addr["address"]) in network:
+                return interface["name"], addr["address"]
+    return None
+
+def get_scan_networks() -> List[ipaddress.IPv4Network]:
+    """获取本机网络接口所在的待扫描网段（网络后端自带网段时使用后端的网段）"""
+    networks = network_backend.scan_networks()
+    if networks is not None:
+        return networks
+
+    networks = []
+    for interface in get_network_interfaces():
         for addr in interface["addresses"]:
             if addr["family"] == "AF_INET" and addr["netmask"]:
                 try:
                     network = ipaddress.IPv4Network(f"{addr['address']}/{addr['netmask']}", strict=False)
-                    # 只扫描小网段
-                    if network.num_addresses <= 254:
-                        print(f"扫描网段: {network}")
-                        devices = ping_scan_network(str(network))
-                        ping_devices.extend(devices)
-                except Exception as e:
-                    print(f"扫描网段失败: {e}")
-
-    print(f"通过ping发现 {len(ping_devices)} 个设备")
-
-    # 3. 合并设备列表
+                except ValueError as e:
+                    print(f"解析网段失败: {e}")
+                    continue
+                # 只扫描不超过上限的网段
+                if host_range(network)[1] <= MAX_SCAN_HOSTS and network not in networks:
+                    networks.append(network)
+    return networks
+
+def annotate_vendor(device: Dict[str, Any]) -> Dict[str, Any]:
+    """根据MAC地址前缀补充设备厂商"""
+    mac = device.get("mac")
+    device["vendor"] = (oui_index.lookup(mac) or "") if oui_index is not None and mac else ""
+    return device
+
+async def iter_network_devices(networks: Optional[List[ipaddress.IPv4Network]] = None
+                               ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    设备发现流水线 - 发现设备后立即产出
+
+    networks 为空时扫描本机网络接口所在的所有网段，否则只发现指定网段内的设备。
+
+    产出 (事件类型, 设备) 元组：
+    - "device": 新发现的设备
+    - "update": 已产出设备的信息更新（例如补充了MAC地址）
+    - "remove": 已产出的设备补充MAC后与另一IP的设备是同一台，已并入该设备
+
+    设备按IP和MAC去重：同一MAC出现在多个IP时保留最先发现的设备，其余IP记入其 aliases。
+    """
+    print("开始发现网络设备...")
     device_dict = {}
+    # MAC -> 拥有该MAC的设备IP；并入其他设备的IP -> 所属设备IP
+    mac_owners: Dict[str, str] = {}
+    aliases: Dict[str, str] = {}
+    # 反向DNS查询与扫描并行进行，不会延长发现时间
+    lookups: Dict[str, asyncio.Task] = {}
+    workers: List[asyncio.Task] = []
+
+    def start_lookup(device: Dict[str, Any]):
+        """为没有主机名的设备启动反向查询，缓存命中时直接填充"""
+        if device["hostname"] or device["ip"] in lookups:
+            return
+        observed = passive_observations.get(device["ip"])
+        if observed is not None and observed["hostname"]:
+            device["hostname"] = observed["hostname"]
+            return
+        if hostname_resolver is None:
+            return
+        cached = hostname_resolver.cached(device["ip"])
+        if cached is not None:
+            device["hostname"] = cached
+        else:
+            lookups[device["ip"]] = asyncio.create_task(hostname_resolver.resolve(device["ip"]))
+
+    def find_device(ip: str) -> Optional[Dict[str, Any]]:
+        """按IP查找设备（包括已并入其他设备的IP）"""
+        return device_dict.get(ip) or device_dict.get(aliases.get(ip, ""))
+
+    def merge_mac(device: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        """
+        按MAC去重：MAC已属于另一IP的设备时，将本设备的IP记入该设备的 aliases 并补充其缺失的字段，
+        返回该设备；否则登记MAC并返回None
+        """
+        owner_ip = mac_owners.setdefault(device["mac"].upper(), device["ip"])
+        if owner_ip == device["ip"]:
+            return None
+        owner = device_dict[owner_ip]
+        owner.setdefault("aliases", []).append(device["ip"])
+        aliases[device["ip"]] = owner_ip
+        if device["hostname"] and not owner["hostname"]:
+            owner["hostname"] = device["hostname"]
+        if device.get("open_ports") and not owner.get("open_ports"):
+            owner["open_ports"] = device["open_ports"]
+            owner["services"] = device["services"]
+        return owner
+
+    def finished_lookups() -> List[Dict[str, Any]]:
+        """取出已完成的查询，返回获得主机名的设备"""
+        resolved = []
+        for ip in [ip for ip, task in lookups.items() if task.done()]:
+            task = lookups.pop(ip)
+            if task.cancelled() or task.exception() is not None or not task.result():
+                continue
+            device = find_device(ip)
+            # 并入其他设备的IP的主机名只在该设备没有主机名时使用
+            if device is None or (device["ip"] != ip and device["hostname"]):
+                continue
+            device["hostname"] = task.result()
+            resolved.append(device)
+        return resolved
 
-    # 添加ARP设备（有MAC地址）
-    for device in arp_devices:
-        key = device["ip"]
-        device_dict[key] = device
-
-    # 添加ping设备（可能没有MAC地址）
-    for device in ping_devices:
-        key = device["ip"]
-        if key not in device_dict:
-            device_dict[key] = device
-
-    # 尝试为ping设备获取MAC地址
-    for ip, device in device_dict.items():
-        if not device["mac"]:
-            # 再次查询ARP表
+    try:
+        # 1. 从ARP表获取已知设备（有MAC地址）
+        arp_devices = await asyncio.to_thread(get_arp_table)
+        print(f"从ARP表发现 {len(arp_devices)} 个设备")
+        for device in arp_devices:
+            if networks is not None and not any(
+                    ipaddress.ip_address(device["ip"]) in network for network in networks):
+                continue
+            if find_device(device["ip"]) is None:
+                annotate_vendor(device)
+                owner = merge_mac(device) if device["mac"] else None
+                if owner is not None:
+                    yield "update", owner
+                    continue
+                device_dict[device["ip"]] = device
+                start_lookup(device)
+                yield "device", device
+
+        # 2. 扫描网段：直连网段使用ARP扫描（直接得到MAC），其他使用ping扫描（可能没有MAC地址）
+        #    每个网段一个工作任务并发扫描，共享全局探测并发预算，结果在此处按IP和MAC合并去重
+        if networks is None:
+            networks = await asyncio.to_thread(get_scan_networks)
+        results: asyncio.Queue = asyncio.Queue()
+        worker_slots = asyncio.Semaphore(DISCOVERY_WORKERS)
+
+        async def scan_worker(network: ipaddress.IPv4Network):
+            """扫描单个网段，将 (IP, MAC, 端口信息) 放入结果队列"""
             try:
-                if platform.system().lower() == 'windows':
-                    result = subprocess.run(['arp', '-a', ip], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        match = re.search(r'([a-fA-F0-9-]{17})', result.stdout)
-                        if match:
-                            device["mac"] = match.group(1).replace('-', ':').upper()
+                async with worker_slots:
+                    print(f"扫描网段: {network}")
+                    found = set(device_dict)
+                    arp_source = await asyncio.to_thread(find_arp_source, network)
+                    # 记录已发现主机的开放端口；丢弃ICMP的主机可能仍开放服务端口，用TCP连接补充探测。
+                    # 直连网段已经过ARP扫描时，未应答ARP的地址无法建立TCP连接，不再探测
+                    probe_unknown = not (arp_source is not None and _arp_scan_enabled)
+                    async for ip, mac in iter_scan_network(str(network), arp_source=arp_source,
+                                                           port_phase=PORT_PROBE_ENABLED and bool(PORT_PROBE_PORTS)
+                                                                      and probe_unknown):
+                        found.add(ip)
+                        results.put_nowait((ip, mac, None))
+
+                    if PORT_PROBE_ENABLED:
+                        async for ip, ports in iter_port_probe_network(network, found | set(device_dict),
+                                                                       probe_unknown=probe_unknown):
+                            results.put_nowait((ip, "", ports))
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                print(f"扫描网段 {network} 失败: {e}")
+            finally:
+                results.put_nowait(None)
+
+        workers = [asyncio.create_task(scan_worker(network)) for network in networks]
+        scan_count = 0
+        running = len(workers)
+        while running:
+            item = await results.get()
+            if item is None:
+                running -= 1
+                continue
+            ip, mac, ports = item
+            scan_count += 1
+            device = find_device(ip)
+            if device is None:
+                device = annotate_vendor({"ip": ip, "mac": mac, "hostname": "", **(ports or {})})
+                owner = merge_mac(device) if mac else None
+                if owner is not None:
+                    yield "update", owner
                 else:
-                    result = subprocess.run(['arp', ip], capture_output=True, text=True, timeout=5)
-                    if result.returncode == 0:
-                        match = re.search(r'([a-fA-F0-9:]{17})', result.stdout)
-                        if match:
-                            device["mac"] = match.group(1).upper()
-            except Exception:
+                    device_dict[ip] = device
+                    start_lookup(device)
+                    yield "device", device
+            else:
+                changed = False
+                if mac and not device["mac"]:
+                    device["mac"] = mac
+                    annotate_vendor(device)
+                    owner = merge_mac(device)
+                    if owner is not None:
+                        del device_dict[ip]
+                        yield "remove", device
+                        device = owner
+                    changed = True
+                if ports and not device.get("open_ports"):
+                    device.update(ports)
+                    changed = True
+                if changed:
+                    yield "update", device
+            for resolved in finished_lookups():
+                yield "update", resolved
+
+        print(f"通过扫描发现 {scan_count} 个设备")
+
+        # 3. 为没有MAC地址的设备补充MAC：扫描后重新读取一次邻居表，在内存中关联
+        missing = [device for device in device_dict.values() if not device["mac"]]
+        if missing:
+            neighbor_macs = {entry["ip"]: entry["mac"] for entry in passive_observations.devices() if entry["mac"]}
+            neighbor_table = await asyncio.to_thread(get_arp_table)
+            neighbor_macs.update((entry["ip"], entry["mac"]) for entry in neighbor_table if entry["mac"])
+            for device in missing:
+                mac = neighbor_macs.get(device["ip"])
+                if mac:
+                    device["mac"] = mac
+                    annotate_vendor(device)
+                    owner = merge_mac(device)
+                    if owner is not None:
+                        del device_dict[device["ip"]]
+                        yield "remove", device
+                        device = owner
+                    yield "update", device
+
+        # 扫描结束时只使用已完成的查询，其余查询在后台完成后写入缓存供下次使用
+        for resolved in finished_lookups():
+            yield "update", resolved
+    finally:
+        for task in workers:
+            task.cancel()
+        for task in lookups.values():
+            task.cancel()
+
+    print(f"总共发现 {len(device_dict)} 个设备")
+
+    # 4. 批量写入设备清单
+    if device_inventory is not None:
+        try:
+            await device_inventory.upsert_many(device_dict.values())
+        except Exception as e:
+            print(f"写入设备清单失败: {e}")
+
+def annotate_presence(device: Dict[str, Any]) -> Dict[str, Any]:
+    """根据ARP监听记录补充设备的在线状态和最后出现时间"""
+    if arp_sniffer is None or not device.get("mac"):
+        return device
+    seen = arp_presence.last_seen(device["mac"])
+    if seen is not None:
+        device["last_seen"] = max(device.get("last_seen") or 0, seen)
+    if device.get("last_seen"):
+        device["online"] = time.time() - device["last_seen"] <= ONLINE_WINDOW
+    return device
+
+def merge_passive_observations(devices: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    将被动监听到的主机名/MAC合并到发现结果中，并加入尚未被扫描到的设备
+
+    与扫描结果相同按MAC去重：MAC已属于另一IP的设备时，将本设备的IP记入该设备的 aliases。
+    """
+    observations = {entry["ip"]: entry for entry in passive_observations.devices()}
+    if not observations:
+        return devices
+
+    merged: List[Dict[str, Any]] = []
+    mac_owners: Dict[str, Dict[str, Any]] = {}
+
+    def add(device: Dict[str, Any]):
+        mac = (device.get("mac") or "").upper()
+        owner = mac_owners.get(mac) if mac else None
+        if owner is None:
+            if mac:
+                mac_owners[mac] = device
+            merged.append(device)
+            return
+        owner["aliases"] = owner.get("aliases", []) + [device["ip"]] + device.get("aliases", [])
+        if device.get("hostname") and not owner.get("hostname"):
+            owner["hostname"] = device["hostname"]
+
+    for device in devices:
+        # 复制后再修改，不改动发现缓存中的设备
+        device = dict(device)
+        for ip in [device["ip"]] + device.get("aliases", []):
+            observed = observations.pop(ip, None)
+            if observed is None:
+                continue
+            if observed["hostname"] and not device.get("hostname"):
+                device["hostname"] = observed["hostname"]
+            if observed["mac"] and not device.get("mac"):
+                device["mac"] = observed["mac"]
+                annotate_vendor(device)
+        add(device)
+    for observed in observations.values():
+        add(annotate_vendor(observed))
+    return merged
+
+async def persist_passive_observations(entries: List[Dict[str, Any]]) -> int:
+    """
+    将被动监听的观测写入设备清单
+
+    mDNS/NetBIOS 报文不含MAC地址，写入前先从ARP监听记录和邻居表补充；
+    仍没有MAC的观测会被设备清单跳过，只保留在内存中合并到发现结果。
+    """
+    missing = [entry for entry in entries if not entry["mac"]]
+    for entry in missing:
+        entry["mac"] = arp_presence.mac_for_ip(entry["ip"]) or ""
+    missing = [entry for entry in missing if not entry["mac"]]
+    if missing:
+        neighbor_macs = {entry["ip"]: entry["mac"] for entry in await asyncio.to_thread(get_arp_table)
+                         if entry["mac"]}
+        for entry in missing:
+            entry["mac"] = neighbor_macs.get(entry["ip"], "")
+    return await device_inventory.upsert_many(entries)
+
+class DiscoveryInterrupted(Exception):
+    """设备发现超过期限被取消，结果不完整"""
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        # 取消前已发现的设备（由 discover_network_devices 填充）
+        self.devices: List[Dict[str, Any]] = []
+
+async def run_discovery(networks: Optional[List[ipaddress.IPv4Network]] = None,
+                        deadline: float = DISCOVERY_DEADLINE
+                        ) -> AsyncIterator[Tuple[str, Dict[str, Any]]]:
+    """
+    在独立任务中运行发现流水线并转发其事件
+
+    整体期限到达或调用方停止迭代（例如发现缓存的刷新被取消）时取消该任务，
+    未完成的扫描由扫描游标在下次继续。期限到达时抛出 DiscoveryInterrupted，
+    调用方据此区分不完整的结果，不应将其作为完整结果缓存或比较。
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    finished = object()
+
+    async def produce():
+        try:
+            async for item in iter_network_devices(networks):
+                queue.put_nowait(item)
+        finally:
+            queue.put_nowait(finished)
+
+    task = asyncio.create_task(produce())
+    end = time.monotonic() + deadline
+    try:
+        while True:
+            remaining = end - time.monotonic()
+            if remaining <= 0:
+                print(f"设备发现超过期限 {deadline}s，已取消")
+                raise DiscoveryInterrupted(f"设备发现超过期限 {deadline}s")
+            try:
+                item = await asyncio.wait_for(queue.get(), remaining)
+            except asyncio.TimeoutError:
+                continue
+            if item is finished:
+                # 传递流水线中的异常
+                await task
+                break
+            yield item
+    finally:
+        if not task.done():
+            task.cancel()
+            try:
+                await task
+            except asyncio.CancelledError:
                 pass
 
-    devices_list = list(device_dict.values())
-    print(f"总共发现 {len(devices_list)} 个设备")
+async def discover_network_devices(networks: Optional[List[ipaddress.IPv4Network]] = None,
+                                   on_event: Optional[Callable[[str, Dict[str, Any]], None]] = None
+                                   ) -> List[Dict[str, str]]:
+    """
+    发现网络设备 - 结合ARP表和ping扫描，最长运行 DISCOVERY_DEADLINE 秒
+
+    on_event 为每个发现事件 (事件类型, 设备) 的回调，供发现缓存转发给流式客户端。
+
+    Raises:
+        DiscoveryInterrupted: 超过期限，异常的 devices 为已发现的部分设备
+    """
+    devices = {}
+    try:
+        async for event, device in run_discovery(networks):
+            if event == "remove":
+                devices.pop(device["ip"], None)
+            else:
+                devices[device["ip"]] = device
+            if on_event is not None:
+                on_event(event, device)
+    except DiscoveryInterrupted as e:
+        e.devices = list(devices.values())
+        raise
+    return list(devices.values())
+
+async def discover_subnet(network: str) -> List[Dict[str, str]]:
+    """发现单个网段内的设备（供后台调度使用）"""
+    return await discover_network_devices([ipaddress.IPv4Network(network, strict=False)])
+
+def build_discovery_schedule() -> Dict[str, float]:
+    """构建后台发现调度：显式配置的网段，加上按默认间隔调度的本机网段"""
+    schedule = parse_schedule(os.getenv('WOL_DISCOVERY_SCHEDULE', ''), DISCOVERY_INTERVAL)
+    if DISCOVERY_INTERVAL > 0:
+        for network in get_scan_networks():
+            schedule.setdefault(str(network), DISCOVERY_INTERVAL)
+    return schedule
+
+async def resolve_wake_mac(wake_data: dict) -> str:
+    """获取唤醒目标的MAC地址，未提供MAC时按IP依次从ARP监听记录、邻居表和设备清单解析"""
+    mac_address = wake_data.get("mac_address")
+    if mac_address:
+        return mac_address
+
+    ip_address = wake_data.get("ip_address")
+    if not ip_address:
+        raise HTTPException(status_code=400, detail="缺少MAC地址")
+
+    # ARP监听记录无需系统调用，优先使用
+    mac_address = arp_presence.mac_for_ip(ip_address)
+    if mac_address:
+        return mac_address
+
+    # netlink查询是阻塞调用，在工作线程中执行
+    entry = await asyncio.to_thread(lookup_neighbor_mac, ip_address)
+    if entry:
+        return entry["mac"]
+
+    # 设备关机后邻居表条目会过期，最后使用设备清单中该IP最近一次出现时的MAC
+    if device_inventory is not None:
+        try:
+            device = await device_inventory.get_by_ip(ip_address)
+        except Exception as e:
+            print(f"查询设备清单失败: {e}")
+            device = None
+        if device and device.get("mac"):
+            return device["mac"]
 
-    return devices_list
+    raise HTTPException(status_code=404, detail=f"邻居表和设备清单中未找到IP {ip_address} 对应的MAC地址")
 
 def get_client_ip(request: Request) -> str:
     """获取客户端IP地址"""
@@ -340,31 +1047,23 @@ def get_client_ip(request: Request) -> str:
     
     return request.client.host if request.client else "unknown"
 
+def rebuild_whitelist_matcher():
+    """白名单变化后重新编译匹配器，并使判定缓存失效"""
+    global whitelist_matcher
+    whitelist_matcher = CidrMatcher(ip_whitelist)
+    if whitelist_matcher.invalid:
+        print(f"忽略无效的白名单条目: {', '.join(whitelist_matcher.invalid)}")
+    whitelist_decisions.invalidate()
+
+def _match_whitelist(ip: str) -> bool:
+    """用当前匹配器判断（在判定缓存取得代数之后读取匹配器，避免缓存旧匹配器的结果）"""
+    return whitelist_matcher.contains(ip)
+
 def is_ip_in_whitelist(ip: str) -> bool:
-    """检查IP是否在白名单中"""
+    """检查IP是否在白名单中（支持单个IP和CIDR网段）"""
     if not ip or ip == "unknown":
         return False
-    
-    try:
-        client_ip = ipaddress.ip_address(ip)
-        
-        for whitelist_ip in ip_whitelist:
-            try:
-                if '/' in whitelist_ip:
-                    # CIDR网段
-                    network = ipaddress.ip_network(whitelist_ip, strict=False)
-                    if client_ip in network:
-                        return True
-                else:
-                    # 单个IP
-                    if client_ip == ipaddress.ip_address(whitelist_ip):
-                        return True
-            except ValueError:
-                continue
-        
-        return False
-    except ValueError:
-        return False
+    return whitelist_decisions.lookup(ip, _match_whitelist)
 
 def add_ip_to_whitelist(ip: str) -> bool:
     """添加IP到白名单"""
@@ -375,6 +1074,7 @@ def add_ip_to_whitelist(ip: str) -> bool:
             ipaddress.ip_address(ip)
         
         ip_whitelist.add(ip)
+        rebuild_whitelist_matcher()
         return True
     except ValueError:
         return False
@@ -383,6 +1083,7 @@ def remove_ip_from_whitelist(ip: str) -> bool:
     """从白名单移除IP"""
     if ip in ip_whitelist:
         ip_whitelist.remove(ip)
+        rebuild_whitelist_matcher()
         return True
     return False
 
@@ -487,6 +1188,53 @@ app = FastAPI(
     redoc_url="/redoc"
 )
 
+@app.on_event("startup")
+async def start_background_tasks():
+    """启动后台任务"""
+    global discovery_scheduler, passive_listener, arp_sniffer
+    traffic_sampler.start()
+
+    if ARP_SNIFF_ENABLED:
+        names = os.getenv('WOL_ARP_SNIFF_INTERFACES', '')
+        interfaces = ([name.strip() for name in names.split(',') if name.strip()] if names else
+                      [i["name"] for i in get_network_interfaces()
+                       if any(addr["family"] == "AF_INET" for addr in i["addresses"])])
+        sniffer = ArpSniffer(interfaces, arp_presence)
+        started = sniffer.start()
+        if started:
+            arp_sniffer = sniffer
+        print(f"ARP监听已启用: {', '.join(started) or '无'}")
+
+    if PASSIVE_LISTEN_ENABLED:
+        protocols = [p.strip() for p in os.getenv('WOL_PASSIVE_PROTOCOLS', ','.join(PASSIVE_PROTOCOLS)).split(',')]
+        passive_listener = PassiveListener(
+            passive_observations, protocols,
+            on_update=persist_passive_observations if device_inventory is not None else None
+        )
+        started = await passive_listener.start()
+        print(f"被动监听已启用: {', '.join(started) or '无'}")
+
+    schedule = build_discovery_schedule()
+    if schedule:
+        discovery_scheduler = DiscoveryScheduler(discover_subnet, schedule)
+        discovery_scheduler.start()
+
+@app.on_event("shutdown")
+async def stop_background_tasks():
+    """停止后台任务"""
+    await traffic_sampler.stop()
+    await discovery_cache.stop()
+    if passive_listener is not None:
+        await passive_listener.stop()
+    if arp_sniffer is not None:
+        await arp_sniffer.stop()
+    if discovery_scheduler is not None:
+        await discovery_scheduler.stop()
+    if device_inventory is not None:
+        device_inventory.close()
+    if hostname_resolver is not None:
+        hostname_resolver.close()
+
 # 添加CORS中间件
 app.add_middleware(
     CORSMiddleware,
@@ -1298,6 +2046,8 @@ MAIN_PAGE = """<!DOCTYPE html>
         // 页面加载时初始化
         document.addEventListener('DOMContentLoaded', function() {{
             loadInterfaces();
+            loadInventory();
+            subscribeDiscoveryEvents();
             loadWhitelist();
             checkCurrentIpStatus();
             loadSystemInfo();
@@ -1502,40 +2252,143 @@ MAIN_PAGE = """<!DOCTYPE html>
             }}
         }}
 
-        // 发现网络设备
-        async function discoverDevices() {{
+        // 设备选择框中的选项 {{ip: option}}
+        const deviceOptions = {{}};
+
+        function formatDeviceText(device) {{
+            const ports = device.open_ports && device.open_ports.length ? ` [端口 ${{device.open_ports.join(',')}}]` : '';
+            if (!device.mac) return `${{device.ip}} - (无MAC地址)${{ports}}`;
+            const details = [device.hostname, device.vendor].filter(Boolean).join(', ');
+            let status = '';
+            if (device.online === true) {{
+                status = '🟢 ';
+            }} else if (device.online === false && device.last_seen) {{
+                status = `⚪ (最后在线 ${{new Date(device.last_seen * 1000).toLocaleString()}}) `;
+            }}
+            return details ?
+                `${{status}}${{device.ip}} - ${{device.mac}} (${{details}})${{ports}}` :
+                `${{status}}${{device.ip}} - ${{device.mac}}${{ports}}`;
+        }}
+
+        function upsertDeviceOption(device) {{
             const deviceSelect = document.getElementById('deviceSelect');
-            const button = event.target;
+            let option = deviceOptions[device.ip];
+            const isNew = !option;
+            if (isNew) {{
+                option = document.createElement('option');
+                deviceOptions[device.ip] = option;
+                deviceSelect.appendChild(option);
+            }}
+            option.value = JSON.stringify(device);
+            option.textContent = formatDeviceText(device);
+            return isNew;
+        }}
 
-            button.disabled = true;
-            button.innerHTML = '<span>🔍</span> 发现中...';
+        function removeDeviceOption(ip) {{
+            const option = deviceOptions[ip];
+            if (option) {{
+                option.remove();
+                delete deviceOptions[ip];
+            }}
+        }}
+
+        function clearDeviceOptions() {{
+            Object.keys(deviceOptions).forEach(removeDeviceOption);
+        }}
+
+        // 加载设备清单到设备选择框
+        async function loadInventory() {{
+            if (!document.getElementById('deviceSelect')) return;
+
+            try {{
+                const response = await fetch('/inventory/devices?limit=500');
+                if (!response.ok) return;
+                const data = await response.json();
+                if (!data.success) return;
+                data.devices.forEach(upsertDeviceOption);
+            }} catch (error) {{
+                console.error('加载设备清单失败:', error);
+            }}
+        }}
+
+        // 订阅后台发现的差异事件，只更新变化的设备
+        async function subscribeDiscoveryEvents() {{
+            if (!window.EventSource || !document.getElementById('deviceSelect')) return;
 
             try {{
-                const response = await fetch('/discover/devices');
+                const response = await fetch('/discover/schedule');
+                if (!response.ok) return;
                 const data = await response.json();
+                if (!data.enabled) return;
+            }} catch (error) {{
+                return;
+            }}
 
-                if (data.success && data.devices) {{
-                    deviceSelect.innerHTML = '<option value="">选择已发现的设备</option>';
-
-                    data.devices.forEach(device => {{
-                        const displayText = device.mac ?
-                            `${{device.ip}} - ${{device.mac}}` :
-                            `${{device.ip}} - (无MAC地址)`;
-                        const option = document.createElement('option');
-                        option.value = JSON.stringify(device);
-                        option.textContent = displayText;
-                        deviceSelect.appendChild(option);
-                    }});
+            const source = new EventSource('/discover/events');
+            source.addEventListener('snapshot', (e) => {{
+                JSON.parse(e.data).devices.forEach(upsertDeviceOption);
+            }});
+            source.addEventListener('delta', (e) => {{
+                const delta = JSON.parse(e.data);
+                delta.added.forEach(upsertDeviceOption);
+                delta.changed.forEach(upsertDeviceOption);
+                delta.removed.forEach(device => removeDeviceOption(device.ip));
+            }});
+        }}
 
-                    // 显示发现结果
-                    const resultDiv = document.getElementById('advancedResult');
-                    resultDiv.innerHTML = `<div class="result success">✅ 发现 ${{data.count}} 个设备</div>`;
-                }} else {{
-                    const resultDiv = document.getElementById('advancedResult');
-                    resultDiv.innerHTML = `<div class="result error">❌ 设备发现失败: ${{data.message || '未知错误'}}</div>`;
+        // 发现网络设备 - 流式读取，每发现一个设备立即显示
+        async function discoverDevices() {{
+            const resultDiv = document.getElementById('advancedResult');
+            const button = event.target.closest('button');
+            let count = 0;
+
+            button.disabled = true;
+            button.innerHTML = '<span>🔍</span> 发现中...';
+            clearDeviceOptions();
+            resultDiv.innerHTML = '<div class="result info">🔍 正在发现设备...</div>';
+
+            function renderDevice(device) {{
+                if (upsertDeviceOption(device)) count++;
+                resultDiv.innerHTML = `<div class="result info">🔍 正在发现设备... 已发现 ${{count}} 个</div>`;
+            }}
+
+            function handleLine(line) {{
+                if (!line.trim()) return;
+                const message = JSON.parse(line);
+                if (message.type === 'device' || message.type === 'update') {{
+                    renderDevice(message.device);
+                }} else if (message.type === 'remove') {{
+                    if (deviceOptions[message.device.ip]) count--;
+                    removeDeviceOption(message.device.ip);
+                }} else if (message.type === 'done') {{
+                    resultDiv.innerHTML = `<div class="result success">✅ 发现 ${{message.count}} 个设备</div>`;
+                }} else if (message.type === 'timeout') {{
+                    resultDiv.innerHTML = `<div class="result info">⏱️ ${{message.message}}，已发现 ${{message.count}} 个设备（结果不完整，再次发现将从中断处继续）</div>`;
+                }} else if (message.type === 'error') {{
+                    resultDiv.innerHTML = `<div class="result error">❌ 设备发现失败: ${{message.message || '未知错误'}}</div>`;
+                }}
+            }}
+
+            try {{
+                const response = await fetch('/discover/devices/stream');
+                if (!response.ok) {{
+                    throw new Error(`HTTP ${{response.status}}`);
+                }}
+
+                const reader = response.body.getReader();
+                const decoder = new TextDecoder();
+                let buffer = '';
+
+                while (true) {{
+                    const {{ done, value }} = await reader.read();
+                    if (done) break;
+                    buffer += decoder.decode(value, {{ stream: true }});
+                    const lines = buffer.split('\\n');
+                    buffer = lines.pop();
+                    lines.forEach(handleLine);
                 }}
+                handleLine(buffer);
             }} catch (error) {{
-                const resultDiv = document.getElementById('advancedResult');
                 resultDiv.innerHTML = `<div class="result error">❌ 设备发现失败: ${{error.message}}</div>`;
             }} finally {{
                 button.disabled = false;
@@ -1868,6 +2721,21 @@ async def get_interfaces(request: Request):
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"获取网络接口失败: {str(e)}")
 
+@app.get("/interfaces/stats")
+async def get_interface_stats(request: Request, interface: Optional[str] = None, points: Optional[int] = None):
+    """获取网络接口流量速率时间序列"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    stats = traffic_sampler.get_stats(interface, points)
+    if interface and interface not in stats["interfaces"]:
+        raise HTTPException(status_code=404, detail=f"未找到接口 {interface} 的流量数据")
+    return stats
+
 @app.post("/wake")
 async def wake_device(request: Request, wake_data: dict):
     """简单设备唤醒"""
@@ -1878,9 +2746,7 @@ async def wake_device(request: Request, wake_data: dict):
     if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
         raise HTTPException(status_code=401, detail="需要登录")
 
-    mac_address = wake_data.get("mac_address")
-    if not mac_address:
-        raise HTTPException(status_code=400, detail="缺少MAC地址")
+    mac_address = await resolve_wake_mac(wake_data)
 
     try:
         success, debug_info = send_magic_packet(mac_address)
@@ -1907,14 +2773,11 @@ async def wake_device_advanced(request: Request, wake_data: dict):
     if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
         raise HTTPException(status_code=401, detail="需要登录")
 
-    mac_address = wake_data.get("mac_address")
+    mac_address = await resolve_wake_mac(wake_data)
     broadcast_ip = wake_data.get("broadcast_ip", "255.255.255.255")
     port = wake_data.get("port", 9)
     interface = wake_data.get("interface")
 
-    if not mac_address:
-        raise HTTPException(status_code=400, detail="缺少MAC地址")
-
     try:
         success, debug_info = send_magic_packet(mac_address, broadcast_ip, port, interface)
         return {
@@ -1936,7 +2799,126 @@ async def wake_device_advanced(request: Request, wake_data: dict):
 
 @app.get("/discover/devices")
 async def discover_devices(request: Request):
-    """发现网络设备"""
+    """发现网络设备 - 返回缓存结果及其年龄，结果过期时在后台刷新"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    try:
+        try:
+            result = await discovery_cache.get()
+            complete = True
+        except DiscoveryInterrupted as e:
+            # 还没有缓存且首次发现超过期限：返回部分结果但不缓存，下次发现从扫描游标处继续
+            result = {"devices": e.devices, "age": 0, "stale": True, "refreshing": False}
+            complete = False
+        devices = merge_passive_observations(result["devices"])
+        if arp_sniffer is not None:
+            devices = [annotate_presence(dict(device)) for device in devices]
+        return {
+            "success": True,
+            "devices": devices,
+            "count": len(devices),
+            "age": result["age"],
+            "stale": result["stale"],
+            "refreshing": result["refreshing"],
+            "complete": complete
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e),
+            "devices": [],
+            "count": 0
+        }
+
+@app.get("/discover/devices/stream")
+async def discover_devices_stream(request: Request):
+    """流式发现网络设备 - 每发现一个设备立即输出一行JSON (NDJSON)"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    async def event_stream():
+        # 订阅发现缓存正在进行的刷新（没有时启动一次），多个客户端共用同一次发现；
+        # 所有客户端断开且没有其他等待方时刷新被取消
+        queue = discovery_cache.subscribe()
+        seen = set()
+        try:
+            while True:
+                try:
+                    event, payload = await asyncio.wait_for(queue.get(), 1.0)
+                except asyncio.TimeoutError:
+                    if await request.is_disconnected():
+                        return
+                    continue
+                if event == "done":
+                    yield json.dumps({"type": "done", "count": len(payload)}) + "\n"
+                    return
+                if event == "error":
+                    if isinstance(payload, DiscoveryInterrupted):
+                        # 超过期限：告知结果不完整，缓存不会更新
+                        yield json.dumps({"type": "timeout", "count": len(seen), "message": str(payload)},
+                                         ensure_ascii=False) + "\n"
+                    else:
+                        yield json.dumps({"type": "error", "message": str(payload)}, ensure_ascii=False) + "\n"
+                    return
+                if event == "remove":
+                    seen.discard(payload["ip"])
+                else:
+                    seen.add(payload["ip"])
+                yield json.dumps({"type": event, "device": payload}, ensure_ascii=False) + "\n"
+        finally:
+            discovery_cache.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="application/x-ndjson",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/discover/events")
+async def discover_events(request: Request):
+    """后台发现差异事件流 (Server-Sent Events) - 连接时先发送当前快照，之后只发送变化"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    if discovery_scheduler is None:
+        raise HTTPException(status_code=404, detail="后台发现未启用")
+
+    scheduler = discovery_scheduler
+    queue = scheduler.subscribe()
+
+    def format_event(event: Dict[str, Any]) -> str:
+        return f"event: {event['type']}\ndata: {json.dumps(event, ensure_ascii=False)}\n\n"
+
+    async def event_stream():
+        try:
+            yield format_event({"type": "snapshot", "devices": scheduler.devices()})
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15)
+                except asyncio.TimeoutError:
+                    # 保持连接
+                    yield ": keepalive\n\n"
+                    continue
+                yield format_event(event)
+        finally:
+            scheduler.unsubscribe(queue)
+
+    return StreamingResponse(event_stream(), media_type="text/event-stream",
+                             headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"})
+
+@app.get("/discover/schedule")
+async def discover_schedule(request: Request):
+    """获取后台发现调度状态"""
     session_id = request.cookies.get("session_id")
     client_ip = get_client_ip(request)
 
@@ -1944,18 +2926,117 @@ async def discover_devices(request: Request):
     if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
         raise HTTPException(status_code=401, detail="需要登录")
 
+    if discovery_scheduler is None:
+        return {"enabled": False, "subnets": {}}
+    return {"enabled": True, "subnets": discovery_scheduler.status()}
+
+@app.get("/inventory/devices")
+async def list_inventory_devices(request: Request, q: Optional[str] = None, limit: int = 100, offset: int = 0):
+    """查询设备清单 - 支持按完整MAC地址或IP/主机名前缀搜索"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    if device_inventory is None:
+        return {
+            "success": False,
+            "message": "设备清单数据库不可用",
+            "devices": [],
+            "count": 0,
+            "total": 0
+        }
+
+    limit = max(1, min(limit, 1000))
+    offset = max(0, offset)
     try:
-        devices = discover_network_devices()
+        devices, total = await device_inventory.list_devices(q, limit, offset)
+        for device in devices:
+            annotate_vendor(device)
+            annotate_presence(device)
         return {
             "success": True,
             "devices": devices,
-            "count": len(devices)
+            "count": len(devices),
+            "total": total
         }
     except Exception as e:
         return {
             "success": False,
             "message": str(e),
             "devices": [],
+            "count": 0,
+            "total": 0
+        }
+
+@app.get("/discover/subnets")
+async def discover_subnets(request: Request):
+    """获取各网段的扫描进度和存活主机数"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    subnets = []
+    for key, bitmap in subnet_liveness.items():
+        cursor = scan_cursors.get(key)
+        scanning = key in subnet_scan_locks and subnet_scan_locks[key].locked()
+        subnets.append({
+            "network": key,
+            "hosts": bitmap.num_hosts,
+            "alive": bitmap.count(),
+            "scanning": scanning,
+            "next_offset": cursor["next"] if cursor else None,
+            "port_next_offset": cursor.get("port_next") if cursor else None,
+            "complete": cursor is None and not scanning
+        })
+    return {"subnets": subnets, "count": len(subnets)}
+
+@app.get("/discover/rdns")
+async def discover_rdns(request: Request):
+    """获取反向DNS主机名缓存统计"""
+    session_id = request.cookies.get("session_id")
+    if not verify_session(session_id):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    if hostname_resolver is None:
+        return {"enabled": False}
+    return {"enabled": True, **hostname_resolver.stats()}
+
+@app.get("/discover/neighbors")
+async def discover_neighbors(request: Request):
+    """获取内核邻居表（IPv4和IPv6，含NUD状态和时间信息）"""
+    session_id = request.cookies.get("session_id")
+    client_ip = get_client_ip(request)
+
+    # 检查认证：会话或白名单
+    if not verify_session(session_id) and not is_ip_in_whitelist(client_ip):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    if not netlink_available():
+        return {
+            "success": False,
+            "message": "当前系统不支持netlink邻居表",
+            "neighbors": [],
+            "count": 0
+        }
+
+    try:
+        neighbors = await asyncio.to_thread(dump_neighbors)
+        return {
+            "success": True,
+            "neighbors": neighbors,
+            "count": len(neighbors)
+        }
+    except Exception as e:
+        return {
+            "success": False,
+            "message": str(e),
+            "neighbors": [],
             "count": 0
         }
 
@@ -2004,6 +3085,15 @@ async def get_whitelist(request: Request):
 
     return sorted(list(ip_whitelist))
 
+@app.get("/whitelist/cache")
+async def get_whitelist_cache(request: Request):
+    """获取白名单判定缓存统计（含命中率）"""
+    session_id = request.cookies.get("session_id")
+    if not verify_session(session_id):
+        raise HTTPException(status_code=401, detail="需要登录")
+
+    return whitelist_decisions.stats()
+
 @app.post("/whitelist/add")
 async def add_ip_whitelist(request: Request, ip_data: dict):
     """添加IP到白名单"""